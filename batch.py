@@ -0,0 +1,86 @@
+import numpy as np
+
+import engine
+from rules import Rule
+
+# Step many independent boards at once. The boards are stacked into one
+# (N, H, W) array and every board gets its own Rule, so a whole sweep of S/B
+# ranges runs as a single array operation instead of one process per trial.
+# The rules in one batch have to share their kernel, wrapping and number of
+# states; only their tables differ.
+#
+# An integer rule.table gives the next state directly. A float table gives the
+# probability that the cell is alive next generation (birth for dead cells,
+# survival for live ones), which is how the quantum variant is swept.
+
+
+def rule_tables(rules):
+    """Stack the tables of a list of Rules, checking they can share a batch."""
+    first = rules[0]
+    for rule in rules[1:]:
+        if (sorted(rule.kernel) != sorted(first.kernel) or rule.wrapping != first.wrapping
+                or rule.states != first.states):
+            raise ValueError("rules in a batch need the same kernel, wrapping and states")
+    return np.stack([np.asarray(rule.table) for rule in rules])
+
+
+def lookup_batch(tables, cells, counts):
+    """tables[n, cells[n], counts[n]] for every board n."""
+    n = cells.shape[0]
+    dtype = engine.count_type(tables.size)
+    index = cells.astype(dtype)
+    index *= tables.shape[-1]
+    index += counts
+    index += (np.arange(n, dtype=dtype) * dtype(tables[0].size)).reshape((n,) + (1,) * (cells.ndim - 1))
+    return np.take(tables.ravel(), index)
+
+
+def step_batch(boards, rules, rng=None):
+    """Advance every board one generation.
+
+    rules is either one Rule shared by all boards or a list with one per
+    board. Returns (new_boards, stats) where stats holds per-board arrays of
+    population, births and deaths.
+    """
+    cells = boards.astype(np.uint8, copy=False)
+    if isinstance(rules, Rule):
+        rule = rules
+        tables = np.broadcast_to(rule.table, (len(boards),) + rule.table.shape)
+    else:
+        rule = rules[0]
+        tables = rule_tables(rules)
+    counts = engine.neighbor_counts(rule.counted(cells), rule.kernel)
+    new = engine.draw(lookup_batch(np.ascontiguousarray(tables), cells, counts), rng)
+    if not rule.wrapping:
+        engine.clear_border(new)
+    new = new.astype(boards.dtype, copy=False)
+    return new, batch_stats(cells, new)
+
+
+def batch_stats(old, new):
+    """Per-board population, births and deaths between two stacks.
+
+    A cell counts as alive when its state is 1.
+    """
+    old = old == 1
+    new = new == 1
+    return {
+        'population': new.sum(axis=(1, 2)),
+        'births': (new & ~old).sum(axis=(1, 2)),
+        'deaths': (old & ~new).sum(axis=(1, 2)),
+    }
+
+
+def run_batch(boards, rules, generations, rng=None):
+    """Run every board for a number of generations.
+
+    Returns (final_boards, stats) where each stats entry is a
+    (generations, N) array.
+    """
+    history = {'population': [], 'births': [], 'deaths': []}
+    for _ in range(generations):
+        boards, stats = step_batch(boards, rules, rng)
+        for name, values in stats.items():
+            history[name].append(values)
+    return boards, {name: np.array(values).reshape(generations, len(boards))
+                    for name, values in history.items()}
@@ -0,0 +1,340 @@
+import argparse
+import ast
+import glob
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+import stochastic
+from chunked import ChunkBoard
+from hashlife import Hashlife
+from packed import PackedBoard
+from parallel import ParallelStepper
+from rules import BRIANS_BRAIN, Rule
+from sparse import SparseStepper
+
+# Benchmarks for every engine, board size, starting density and rule family.
+# Each case is timed for at least min_time seconds and then one more
+# generation is run under tracemalloc for the peak memory. Results are JSON
+# and can be compared against a stored baseline:
+#
+#   python -m bench --quick -o results.json
+#   python -m bench --baseline bench_baseline.json        # exit 1 on regressions
+#   python -m bench --baseline bench_baseline.json --save-baseline
+#
+# The per-cell update_board() loops are loaded from their scripts with the
+# final main() call cut out of the source, so no window is opened. They are
+# only run on small boards (LEGACY_MAX) since they take seconds per generation.
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+SIZES = (50, 256, 1024, 4096, 8192)
+DENSITIES = (0.0, 0.1, 0.5)  # 0.5 is what fill_board_random() gives
+PATTERNS = sorted(glob.glob(os.path.join(HERE, 'bugs', '*.npy')))
+LEGACY_MAX = 100
+
+RULES = {
+    'life': lambda: Rule.parse('B3/S23'),
+    'bosco': lambda: Rule.parse('R5,C0,M0,S34..58,B34..45,NM'),
+    'brain': lambda: Rule.parse(BRIANS_BRAIN),
+    'quantum': lambda: stochastic.quantum_rule(0.34, 0.34, 0.34),
+}
+
+
+# Legacy scripts
+
+def load_script(path):
+    """Run a script's top level without its main() call and return its globals."""
+    with open(path) as file:
+        tree = ast.parse(file.read(), path)
+    body = []
+    for node in tree.body:
+        if (isinstance(node, ast.Expr) and isinstance(node.value, ast.Call)
+                and isinstance(node.value.func, ast.Name) and node.value.func.id == 'main'):
+            continue
+        if (isinstance(node, ast.If) and isinstance(node.test, ast.Compare)
+                and isinstance(node.test.left, ast.Name) and node.test.left.id == '__name__'):
+            continue
+        body.append(node)
+    tree.body = body
+    namespace = {'__name__': 'bench_' + os.path.splitext(os.path.basename(path))[0], '__file__': path}
+    sys.path.insert(0, os.path.dirname(path))
+    try:
+        exec(compile(tree, path, 'exec'), namespace)
+    finally:
+        sys.path.remove(os.path.dirname(path))
+    return namespace
+
+
+def legacy(path):
+    """Engine factory for the update_board() of a script."""
+    def make(rule, board):
+        namespace = load_script(os.path.join(HERE, path))
+        namespace['dim'] = board.shape
+        namespace['board'] = board.astype(int)
+        # Scripts work out their loop ranges from dim when they are loaded.
+        if 'x_range' in namespace:
+            edge = 0 if namespace.get('wrapping', False) else 1
+            namespace['x_range'] = range(edge, board.shape[0] - edge)
+            namespace['y_range'] = range(edge, board.shape[1] - edge)
+        update_board = namespace['update_board']
+
+        def advance(generations):
+            for _ in range(generations):
+                update_board()
+        return advance
+    return make
+
+
+# Engines
+
+def stepper_engine(rule, board):
+    rng = np.random.default_rng(0)
+    state = {'board': board}
+
+    def advance(generations):
+        for _ in range(generations):
+            state['board'] = rule.step(state['board'], rng)
+    return advance
+
+
+def packed_engine(rule, board):
+    state = {'board': PackedBoard.from_array(board)}
+
+    def advance(generations):
+        for _ in range(generations):
+            state['board'] = state['board'].step(rule.S, rule.B, rule.wrapping)
+    return advance
+
+
+def sparse_engine(rule, board):
+    stepper = SparseStepper(board, rule)
+
+    def advance(generations):
+        for _ in range(generations):
+            stepper.step()
+    return advance
+
+
+def parallel_engine(rule, board):
+    stepper = ParallelStepper(board, rule)
+
+    def advance(generations):
+        for _ in range(generations):
+            stepper.step()
+    advance.close = stepper.close
+    return advance
+
+
+def chunked_engine(rule, board):
+    chunks = ChunkBoard.from_array(board, rule)
+
+    def advance(generations):
+        for _ in range(generations):
+            chunks.step()
+    return advance
+
+
+def hashlife_engine(rule, board):
+    life = Hashlife(rule.S, rule.B)
+    life.set_board(board)
+    return life.advance
+
+
+# name: (factory, rule families it runs, largest board side or None)
+ENGINES = {
+    'ref_loop': (legacy('for_linus/REF.py'), ('life',), LEGACY_MAX),
+    'ltl_loop': (legacy('extras/larger_than_life.py'), ('bosco',), LEGACY_MAX),
+    'quantum_loop': (legacy('extras/quantum.py'), ('quantum',), LEGACY_MAX),
+    'engine': (stepper_engine, ('life', 'bosco', 'brain', 'quantum'), None),
+    'packed': (packed_engine, ('life',), None),
+    'sparse': (sparse_engine, ('life', 'bosco', 'brain'), None),
+    'parallel': (parallel_engine, ('life', 'bosco', 'brain'), None),
+    'chunked': (chunked_engine, ('life', 'brain'), 4096),
+    'hashlife': (hashlife_engine, ('life',), 1024),
+}
+
+
+# Boards
+
+def start_board(size, start, seed=0):
+    """size x size board: a random density (float) or a pattern file centred on it."""
+    board = np.zeros((size, size), dtype=np.uint8)
+    if isinstance(start, float):
+        board[:] = np.random.default_rng(seed).random((size, size)) < start
+        return board
+    pattern = np.load(start) != 0
+    if pattern.shape[0] > size or pattern.shape[1] > size:
+        return None
+    x = (size - pattern.shape[0]) // 2
+    y = (size - pattern.shape[1]) // 2
+    board[x:x + pattern.shape[0], y:y + pattern.shape[1]] = pattern
+    return board
+
+
+def start_name(start):
+    if isinstance(start, float):
+        return f"density {start:g}"
+    return os.path.splitext(os.path.basename(start))[0]
+
+
+def case_key(case):
+    return f"{case['engine']}/{case['rule']}/{case['size']}/{case['start']}"
+
+
+# Running
+
+def time_case(make, rule, board, min_time=0.5, max_generations=1000):
+    """Time one engine on one board; returns (generations, seconds, peak bytes)."""
+    advance = make(rule, board.copy())
+    advance(1)  # warm up caches, pools and the kernel plan
+    generations = 0
+    batch = 1
+    start = time.perf_counter()
+    seconds = 0.0
+    while seconds < min_time and generations < max_generations:
+        batch = min(batch, max_generations - generations)
+        advance(batch)
+        generations += batch
+        seconds = time.perf_counter() - start
+        batch *= 2
+    tracemalloc.start()
+    try:
+        advance(1)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    if hasattr(advance, 'close'):
+        advance.close()
+    return generations, seconds, peak
+
+
+def cases(engines=None, rules=None, sizes=SIZES, starts=None):
+    starts = list(DENSITIES) + PATTERNS if starts is None else starts
+    for name, (make, families, max_size) in ENGINES.items():
+        if engines and name not in engines:
+            continue
+        for family in families:
+            if rules and family not in rules:
+                continue
+            for size in sizes:
+                if max_size is not None and size > max_size:
+                    continue
+                for start in starts:
+                    yield name, make, family, size, start
+
+
+def run(engines=None, rules=None, sizes=SIZES, starts=None, min_time=0.5, log=sys.stderr):
+    results = []
+    for name, make, family, size, start in cases(engines, rules, sizes, starts):
+        board = start_board(size, start)
+        if board is None:
+            continue
+        case = {'engine': name, 'rule': family, 'size': size, 'start': start_name(start)}
+        try:
+            generations, seconds, peak = time_case(make, RULES[family](), board, min_time)
+        except ImportError as error:
+            # e.g. extras/quantum.py needs scipy
+            case['skipped'] = str(error)
+            results.append(case)
+            print(f"{case_key(case)}: skipped ({error})", file=log)
+            continue
+        rate = generations / seconds if seconds else float('inf')
+        case.update({
+            'generations': generations,
+            'seconds': seconds,
+            'gens_per_sec': rate,
+            'cells_per_sec': rate * size * size,
+            'peak_bytes': peak,
+        })
+        results.append(case)
+        print(f"{case_key(case)}: {rate:.1f} gen/s, {rate * size * size / 1e6:.1f} M cells/s, "
+              f"peak {peak / 2**20:.1f} MiB", file=log)
+    return results
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+
+# Baselines
+
+def compare(results, baseline, tolerance=0.2):
+    """Cases more than tolerance slower than in baseline: (key, old, new) gens/sec."""
+    old = {case_key(case): case for case in baseline['results'] if 'gens_per_sec' in case}
+    slower = []
+    for case in results:
+        before = old.get(case_key(case))
+        if before is None or 'gens_per_sec' not in case:
+            continue
+        if case['gens_per_sec'] < before['gens_per_sec'] * (1 - tolerance):
+            slower.append((case_key(case), before['gens_per_sec'], case['gens_per_sec']))
+    return slower
+
+
+def parse_start(text):
+    if os.path.exists(text):
+        return text
+    path = os.path.join(HERE, 'bugs', text + '.npy')
+    if os.path.exists(path):
+        return path
+    return float(text)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='bench', description="Benchmark the stepping engines.")
+    parser.add_argument('--engines', nargs='+', choices=list(ENGINES))
+    parser.add_argument('--rules', nargs='+', choices=list(RULES))
+    parser.add_argument('--sizes', nargs='+', type=int, default=list(SIZES))
+    parser.add_argument('--starts', nargs='+', type=parse_start,
+                        help="densities (0.5) and/or patterns (glider or bugs/glider.npy)")
+    parser.add_argument('--min-time', type=float, default=0.5, help="seconds to time each case for")
+    parser.add_argument('--quick', action='store_true', help="small boards, one density, short timings")
+    parser.add_argument('-o', '--output', help="JSON results file (default: stdout)")
+    parser.add_argument('--baseline', help="JSON results to compare against")
+    parser.add_argument('--save-baseline', action='store_true', help="write the results to --baseline")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="allowed slowdown before a case counts as a regression")
+    args = parser.parse_args(argv)
+    if args.save_baseline and not args.baseline:
+        parser.error("--save-baseline needs --baseline")
+    if args.quick:
+        args.sizes = [size for size in args.sizes if size <= 256]
+        args.starts = args.starts or [0.5, os.path.join(HERE, 'bugs', 'glider_gun.npy')]
+        args.min_time = min(args.min_time, 0.1)
+
+    results = run(args.engines, args.rules, args.sizes, args.starts, args.min_time)
+    report = {'environment': environment(), 'results': results}
+    text = json.dumps(report, indent=1)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(text + '\n')
+    else:
+        print(text)
+
+    if args.baseline and args.save_baseline:
+        with open(args.baseline, 'w') as file:
+            file.write(text + '\n')
+    elif args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        slower = compare(results, baseline, args.tolerance)
+        for key, before, after in slower:
+            print(f"REGRESSION {key}: {before:.1f} -> {after:.1f} gen/s", file=sys.stderr)
+        if slower:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
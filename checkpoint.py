@@ -0,0 +1,112 @@
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+# Automatic checkpoints for long runs. A checkpoint holds the board, the
+# generation number, the rule (its string plus Rule.key() to check it on
+# resume) and the numpy.random bit generator state for stochastic rules, so a
+# resumed run continues exactly where the old one stopped.
+#
+# Files are written by a background thread, so the stepping loop only pays
+# for a copy of the board. Each one is written to a temporary file next to
+# the target and then renamed over it, so a run killed in the middle of a
+# write still leaves the previous checkpoint intact.
+
+
+def save_checkpoint(filename, board, generation, rule, rng_state=None):
+    """Write a checkpoint file atomically."""
+    temp = f"{filename}.{os.getpid()}.tmp"
+    with open(temp, 'wb') as file:
+        np.savez(file, board=board, generation=np.int64(generation),
+                 rule=np.array(str(rule)), rule_key=np.frombuffer(rule.key(), dtype=np.uint8),
+                 rng_state=np.array(json.dumps(rng_state)))
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp, filename)
+
+
+def load_checkpoint(filename):
+    """{'board', 'generation', 'rule', 'rule_key', 'rng_state'} from a checkpoint file."""
+    with np.load(filename) as data:
+        return {
+            'board': data['board'],
+            'generation': int(data['generation']),
+            'rule': str(data['rule']),
+            'rule_key': data['rule_key'].tobytes(),
+            'rng_state': json.loads(str(data['rng_state'])),
+        }
+
+
+def restore(checkpoint, rule, rng=None):
+    """Check a loaded checkpoint against rule and put its state back into rng."""
+    if checkpoint['rule_key'] != rule.key():
+        raise ValueError(f"checkpoint was made with rule {checkpoint['rule']}, not {rule}")
+    if rng is not None and checkpoint['rng_state'] is not None:
+        rng.bit_generator.state = checkpoint['rng_state']
+    return checkpoint['board'], checkpoint['generation']
+
+
+class Checkpointer:
+    """Background checkpoint writer, due every `every` generations or `seconds` seconds."""
+
+    def __init__(self, filename, rule, every=None, seconds=None):
+        self.filename = filename
+        self.rule = rule
+        self.every = every
+        self.seconds = seconds
+        self.last_generation = None
+        self.last_time = time.monotonic()
+        self.written = None  # generation of the last checkpoint on disk
+        self.error = None
+        self._pending = None
+        self._closed = False
+        self._wake = threading.Condition()
+        self._thread = threading.Thread(target=self._write_loop, daemon=True)
+        self._thread.start()
+
+    def due(self, generation):
+        if self.last_generation is None:
+            self.last_generation = generation
+        if self.every and generation - self.last_generation >= self.every:
+            return True
+        return bool(self.seconds) and time.monotonic() - self.last_time >= self.seconds
+
+    def offer(self, generation, board, rng=None, force=False):
+        """Queue a checkpoint if one is due (or force). Returns whether it was queued."""
+        if not force and not self.due(generation):
+            return False
+        state = rng.bit_generator.state if rng is not None else None
+        with self._wake:
+            # Only the newest checkpoint matters; an unwritten older one is dropped.
+            self._pending = (generation, np.array(board, copy=True), state)
+            self._wake.notify()
+        self.last_generation = generation
+        self.last_time = time.monotonic()
+        return True
+
+    def _write_loop(self):
+        while True:
+            with self._wake:
+                while self._pending is None and not self._closed:
+                    self._wake.wait()
+                if self._pending is None:
+                    return
+                generation, board, state = self._pending
+                self._pending = None
+            try:
+                save_checkpoint(self.filename, board, generation, self.rule, state)
+                self.written = generation
+            except OSError as error:
+                self.error = error
+
+    def close(self):
+        """Write anything still queued and stop the writer thread."""
+        with self._wake:
+            self._closed = True
+            self._wake.notify()
+        self._thread.join()
+        if self.error is not None:
+            raise self.error
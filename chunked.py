@@ -0,0 +1,155 @@
+import numpy as np
+
+import engine
+
+# An unbounded board kept as a dict of fixed-size chunks keyed by chunk
+# coordinates. Chunks are allocated when live cells get near them and dropped
+# again once they are empty, so memory follows the population instead of the
+# largest area the pattern ever covered. Gliders just keep flying.
+#
+# Chunks hold cell states, so Generations rules work too: dying cells keep
+# their chunk alive until they have decayed back to 0.
+
+
+class ChunkBoard:
+    """Infinite-plane board indexed with board[x, y] like the ndarray boards."""
+
+    def __init__(self, rule, chunk=64):
+        if np.issubdtype(np.asarray(rule.table).dtype, np.floating):
+            raise ValueError("ChunkBoard only works with deterministic rules")
+        if rule.table[0, 0]:
+            raise ValueError("an infinite board can't use rules with birth on 0 neighbors")
+        self.rule = rule
+        self.kernel = rule.kernel
+        self.chunk = chunk
+        self.radius = rule.radius
+        if self.radius > chunk:
+            raise ValueError("chunk size must be at least the kernel radius")
+        self.table = rule.table
+        self.chunks = {}
+        self.generation = 0
+
+    @classmethod
+    def from_array(cls, board, rule, x0=0, y0=0, chunk=64):
+        """Build from an ndarray board with its top-left corner at (x0, y0)."""
+        chunks = cls(rule, chunk)
+        chunks.paste(board, x0, y0)
+        return chunks
+
+    def paste(self, board, x0=0, y0=0):
+        """Copy an ndarray board into the plane at (x0, y0)."""
+        c = self.chunk
+        height, width = board.shape
+        for cx in range(x0 // c, (x0 + height - 1) // c + 1):
+            for cy in range(y0 // c, (y0 + width - 1) // c + 1):
+                bx0, by0 = max(cx * c, x0), max(cy * c, y0)
+                bx1, by1 = min((cx + 1) * c, x0 + height), min((cy + 1) * c, y0 + width)
+                part = board[bx0 - x0:bx1 - x0, by0 - y0:by1 - y0]
+                if part.any() or (cx, cy) in self.chunks:
+                    self._chunk(cx, cy)[bx0 - cx * c:bx1 - cx * c, by0 - cy * c:by1 - cy * c] = \
+                        self._states(part)
+
+    def _states(self, cells):
+        """Cells as stored: 0/1 for two-state rules, the states for Generations."""
+        if self.rule.states > 2:
+            return np.asarray(cells, dtype=np.uint8)
+        return np.asarray(cells) != 0
+
+    def _chunk(self, cx, cy):
+        tile = self.chunks.get((cx, cy))
+        if tile is None:
+            tile = self.chunks[cx, cy] = np.zeros((self.chunk, self.chunk), dtype=np.uint8)
+        return tile
+
+    def __getitem__(self, index):
+        x, y = index
+        tile = self.chunks.get((x // self.chunk, y // self.chunk))
+        return 0 if tile is None else int(tile[x % self.chunk, y % self.chunk])
+
+    def __setitem__(self, index, value):
+        x, y = index
+        self._chunk(x // self.chunk, y // self.chunk)[x % self.chunk, y % self.chunk] = self._states(value)
+
+    def population(self):
+        return sum(int(np.count_nonzero(tile == 1)) for tile in self.chunks.values())
+
+    def bounds(self):
+        """(x0, y0, x1, y1) of the live cells, inclusive, or None if empty."""
+        found = None
+        for (cx, cy), tile in self.chunks.items():
+            xs, ys = np.nonzero(tile)
+            if len(xs) == 0:
+                continue
+            box = (cx * self.chunk + xs.min(), cy * self.chunk + ys.min(),
+                   cx * self.chunk + xs.max(), cy * self.chunk + ys.max())
+            if found is None:
+                found = box
+            else:
+                found = (min(found[0], box[0]), min(found[1], box[1]),
+                         max(found[2], box[2]), max(found[3], box[3]))
+        return None if found is None else tuple(int(v) for v in found)
+
+    def view(self, x0, y0, height, width, dtype=int):
+        """Dense board[x0:x0+height, y0:y0+width] for draw_board()."""
+        c = self.chunk
+        out = np.zeros((height, width), dtype=dtype)
+        for cx in range(x0 // c, (x0 + height - 1) // c + 1):
+            for cy in range(y0 // c, (y0 + width - 1) // c + 1):
+                tile = self.chunks.get((cx, cy))
+                if tile is None:
+                    continue
+                bx0, by0 = max(cx * c, x0), max(cy * c, y0)
+                bx1, by1 = min((cx + 1) * c, x0 + height), min((cy + 1) * c, y0 + width)
+                out[bx0 - x0:bx1 - x0, by0 - y0:by1 - y0] = \
+                    tile[bx0 - cx * c:bx1 - cx * c, by0 - cy * c:by1 - cy * c]
+        return out
+
+    def to_array(self, dtype=int):
+        """The bounding box of the live cells as ((x0, y0), board)."""
+        box = self.bounds()
+        if box is None:
+            return (0, 0), np.zeros((0, 0), dtype=dtype)
+        x0, y0, x1, y1 = box
+        return (x0, y0), self.view(x0, y0, x1 - x0 + 1, y1 - y0 + 1, dtype)
+
+    def _grow(self):
+        """Allocate empty chunks next to live cells that are near a chunk edge."""
+        c, r = self.chunk, self.radius
+        for (cx, cy), tile in list(self.chunks.items()):
+            rows = tile.any(axis=1)
+            cols = tile.any(axis=0)
+            if not rows.any():
+                continue
+            near = {-1: rows[:r].any(), 0: True, 1: rows[c - r:].any()}
+            near_y = {-1: cols[:r].any(), 0: True, 1: cols[c - r:].any()}
+            for dx in (-1, 0, 1):
+                for dy in (-1, 0, 1):
+                    if near[dx] and near_y[dy]:
+                        self._chunk(cx + dx, cy + dy)
+
+    def _window(self, cx, cy):
+        """A chunk with radius cells of its neighbors around it."""
+        c, r = self.chunk, self.radius
+        window = np.zeros((c + 2 * r, c + 2 * r), dtype=np.uint8)
+        parts = {-1: (slice(0, r), slice(c - r, c)), 0: (slice(r, r + c), slice(0, c)),
+                 1: (slice(r + c, 2 * r + c), slice(0, r))}
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                tile = self.chunks.get((cx + dx, cy + dy))
+                if tile is not None:
+                    window[parts[dx][0], parts[dy][0]] = tile[parts[dx][1], parts[dy][1]]
+        return window
+
+    def step(self):
+        """Advance one generation, then free chunks that ended up empty."""
+        self._grow()
+        keys = list(self.chunks)
+        if keys:
+            r = self.radius
+            windows = np.stack([self._window(cx, cy) for cx, cy in keys])
+            counts = engine.window_counts(self.rule.counted(windows), self.kernel, r)
+            old = windows[:, r:r + self.chunk, r:r + self.chunk]
+            new = engine.lookup(self.table, old, counts)
+            alive = new.any(axis=(1, 2))
+            self.chunks = {key: tile for key, tile, keep in zip(keys, new, alive) if keep}
+        self.generation += 1
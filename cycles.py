@@ -0,0 +1,60 @@
+import collections
+import hashlib
+
+import numpy as np
+
+# Notice when a board settles into a still life or an oscillator. Every
+# generation is reduced to a short hash of its cell states and kept in a
+# bounded history; when a hash comes back, the board has started repeating.
+
+
+def board_hash(board):
+    """16-byte hash of the cell states (and the board shape).
+
+    Two-state boards are hashed as packed bits; boards with more states
+    (Generations rules) as their raw uint8 states, so dying cells count.
+    """
+    cells = np.asarray(board)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(np.array(cells.shape, dtype=np.int64).tobytes())
+    if cells.size and cells.max() > 1:
+        digest.update(np.ascontiguousarray(cells, dtype=np.uint8).tobytes())
+    else:
+        digest.update(np.packbits(cells != 0).tobytes())
+    return digest.digest()
+
+
+class CycleDetector:
+    """Remembers the last history generations and spots repeats."""
+
+    def __init__(self, history=4096):
+        self.history = history
+        self._seen = {}
+        self._order = collections.deque()
+        self.transient = None
+        self.period = None
+
+    def observe(self, generation, board):
+        """Record a generation; returns (transient, period) once it repeats.
+
+        transient is the first generation of the cycle and period its length,
+        so the board at any later generation n equals the board at
+        transient + (n - transient) % period. A period of 1 is a still life.
+        """
+        key = board_hash(board)
+        first = self._seen.get(key)
+        if first is not None:
+            self.transient = first
+            self.period = generation - first
+            return self.transient, self.period
+        self._seen[key] = generation
+        self._order.append(key)
+        if len(self._order) > self.history:
+            del self._seen[self._order.popleft()]
+        return None
+
+    def equivalent(self, generation):
+        """Earliest generation with the same board as generation, once a cycle is known."""
+        if self.period is None or generation < self.transient:
+            return generation
+        return self.transient + (generation - self.transient) % self.period
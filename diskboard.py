@@ -0,0 +1,87 @@
+import os
+
+import numpy as np
+
+import engine
+
+# Boards that live on disk instead of in RAM. A board file is opened as a
+# memmap and stepped a stripe of rows at a time: each stripe is read with
+# kernel-radius halo rows, stepped, and written to the output memmap, so only
+# a few stripes are ever in memory. Boards are stored one byte per cell, which
+# also holds the states of Generations rules.
+
+
+def open_board(filename, mode='r', shape=None, dtype=np.uint8):
+    """Memory-map a board file.
+
+    .npy files (like the ones save_board() writes) carry their own shape and
+    dtype; raw files need shape and dtype.
+    """
+    if filename.endswith('.npy'):
+        return np.load(filename, mmap_mode=mode)
+    if shape is None:
+        raise ValueError("raw board files need a shape")
+    return np.memmap(filename, dtype=dtype, mode=mode, shape=shape)
+
+
+def create_board(filename, shape, dtype=np.uint8):
+    """New zeroed .npy board file, opened for writing."""
+    return np.lib.format.open_memmap(filename, mode='w+', dtype=dtype, shape=tuple(shape))
+
+
+def convert(src, filename, stripe=1024, states=2):
+    """Copy any board (e.g. an 8-byte int .npy) into a uint8 board file."""
+    dst = create_board(filename, src.shape)
+    for start in range(0, src.shape[0], stripe):
+        part = np.asarray(src[start:start + stripe])
+        dst[start:start + stripe] = part if states > 2 else part != 0
+    dst.flush()
+    return dst
+
+
+def step_striped(src, dst, rule, stripe=1024, rng=None):
+    """Write the next generation of src into dst, one stripe of rows at a time.
+
+    rng is needed for rules with probability tables.
+    """
+    height, width = src.shape
+    radius = rule.radius
+    for start in range(0, height, stripe):
+        stop = min(start + stripe, height)
+        window = engine.band_window(src, start, stop, radius)
+        counts = engine.window_counts(rule.counted(window), rule.kernel, radius)
+        old = window[radius:radius + stop - start, radius:radius + width]
+        new = engine.draw(engine.lookup(rule.table, old, counts), rng)
+        if not rule.wrapping:
+            new[:, 0] = 0
+            new[:, -1] = 0
+            if start == 0:
+                new[0] = 0
+            if stop == height:
+                new[-1] = 0
+        dst[start:stop] = new
+    if hasattr(dst, 'flush'):
+        dst.flush()
+    return dst
+
+
+def run_striped(filename, generations, rule, stripe=1024, work=None, rng=None):
+    """Run a board file for some generations without loading it.
+
+    Two work files next to the board (or at work + '.a.npy'/'.b.npy') are
+    used in turn; returns the name of the one holding the final board.
+    """
+    src = open_board(filename)
+    work = work or os.path.splitext(filename)[0]
+    names = [work + '.a.npy', work + '.b.npy']
+    current = filename
+    if src.dtype != np.uint8:
+        # Generation 0 goes to .b so the first step can write .a.
+        src = convert(src, names[1], stripe, rule.states)
+        current = names[1]
+    for generation in range(generations):
+        current = names[generation % 2]
+        dst = create_board(current, src.shape)
+        step_striped(src, dst, rule, stripe, rng)
+        src = dst
+    return current
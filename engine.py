@@ -0,0 +1,263 @@
+import functools
+
+import numpy as np
+
+# Whole-board stepping engine. Same rules as the update_board() loops in
+# for_linus/REF.py and extras/, but computed with array operations instead of
+# visiting every cell in Python.
+#
+# The per-cell versions count neighbors with wrap-around (board[(x+dx) % dim])
+# and, when wrapping is off, only update the interior so the one-cell border is
+# cleared. step() does exactly the same thing.
+
+kernel = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+
+
+def kernel_radius(kernel):
+    """Largest offset in the kernel (1 for the normal 3x3 neighborhood)."""
+    return max((max(abs(dx), abs(dy)) for dx, dy in kernel), default=0)
+
+
+def count_type(size):
+    """Smallest unsigned dtype that can hold a neighbor count up to size."""
+    if size < 256:
+        return np.uint8
+    if size < 65536:
+        return np.uint16
+    return np.uint32
+
+
+# Small kernels are summed with direct shifts. Rectangles (with or without the
+# center cell) bigger than BOX_LIMIT use a running-sum box filter and any other
+# mask bigger than FFT_LIMIT uses an FFT convolution. Neither of those gets
+# slower as the kernel grows.
+BOX_LIMIT = 48
+FFT_LIMIT = 200
+
+
+@functools.lru_cache(maxsize=32)
+def kernel_plan(kernel):
+    """Pick the counting method for a kernel given as a tuple of offsets."""
+    offsets = set(kernel)
+    box = None
+    if offsets and len(offsets) == len(kernel):
+        x0 = min(dx for dx, dy in offsets)
+        x1 = max(dx for dx, dy in offsets)
+        y0 = min(dy for dx, dy in offsets)
+        y1 = max(dy for dx, dy in offsets)
+        area = (x1 - x0 + 1) * (y1 - y0 + 1)
+        if len(kernel) == area:
+            box = (x0, x1, y0, y1, False)
+        elif len(kernel) == area - 1 and x0 <= 0 <= x1 and y0 <= 0 <= y1 and (0, 0) not in offsets:
+            box = (x0, x1, y0, y1, True)
+    if box is not None and len(kernel) > BOX_LIMIT:
+        return ('box', box)
+    if box is None and len(kernel) > FFT_LIMIT:
+        return ('fft', box)
+    return ('shift', box)
+
+
+def shift_counts(window, kernel, radius, h, w):
+    counts = np.zeros(window.shape[:-2] + (h, w), dtype=count_type(len(kernel)))
+    for dx, dy in kernel:
+        counts += window[..., radius + dx:radius + dx + h, radius + dy:radius + dy + w]
+    return counts
+
+
+def running_sum(a, axis):
+    """Cumulative sum along a board axis (-1 or -2) with a leading zero."""
+    dtype = np.int32 if a.size < 2**31 else np.int64
+    shape = list(a.shape)
+    shape[axis] += 1
+    total = np.zeros(shape, dtype=dtype)
+    out = total[..., 1:] if axis == -1 else total[..., 1:, :]
+    np.cumsum(a, axis=axis, dtype=dtype, out=out)
+    return total
+
+
+def box_counts(window, box, radius, h, w):
+    x0, x1, y0, y1, hole = box
+    rows = running_sum(window, -1)
+    rows = rows[..., radius + y1 + 1:radius + y1 + 1 + w] - rows[..., radius + y0:radius + y0 + w]
+    cols = running_sum(rows, -2)
+    counts = cols[..., radius + x1 + 1:radius + x1 + 1 + h, :] - cols[..., radius + x0:radius + x0 + h, :]
+    if hole:
+        counts -= window[..., radius:radius + h, radius:radius + w]
+    return counts
+
+
+@functools.lru_cache(maxsize=8)
+def kernel_spectrum(kernel, shape):
+    """FFT of the kernel laid out so that convolving sums window[x+dx, y+dy]."""
+    image = np.zeros(shape)
+    for dx, dy in kernel:
+        image[-dx % shape[0], -dy % shape[1]] += 1
+    return np.fft.rfft2(image)
+
+
+def fast_length(n):
+    """Smallest m >= n with no prime factors above 5, which FFTs handle quickly."""
+    while True:
+        m = n
+        for p in (2, 3, 5):
+            while m % p == 0:
+                m //= p
+        if m == 1:
+            return n
+        n += 1
+
+
+def fft_counts(window, kernel, radius, h, w):
+    # The window is already padded by radius, so the wrap-around of the
+    # circular convolution only spills into the border we throw away.
+    shape = tuple(fast_length(n) for n in window.shape[-2:])
+    spectrum = np.fft.rfft2(window, s=shape) * kernel_spectrum(kernel, shape)
+    total = np.fft.irfft2(spectrum, s=shape)
+    return np.rint(total[..., radius:radius + h, radius:radius + w])
+
+
+def window_counts(window, kernel, radius=None, method=None):
+    """Neighbor counts for the interior of a window padded by radius on each side.
+
+    The last two axes are the board axes, so a stack of windows works too.
+    method forces 'shift', 'box' or 'fft'; by default it is picked from the
+    kernel with kernel_plan().
+    """
+    kernel = tuple(kernel)
+    if radius is None:
+        radius = kernel_radius(kernel)
+    h = window.shape[-2] - 2 * radius
+    w = window.shape[-1] - 2 * radius
+    plan, box = kernel_plan(kernel)
+    if method is not None and method != plan:
+        if method == 'box' and box is None:
+            raise ValueError("kernel is not a box, can't use method='box'")
+        plan = method
+    if plan == 'shift':
+        return shift_counts(window, kernel, radius, h, w)
+    if plan == 'box':
+        counts = box_counts(window, box, radius, h, w)
+    elif plan == 'fft':
+        counts = fft_counts(window, kernel, radius, h, w)
+    else:
+        raise ValueError(f"unknown counting method {method!r}")
+    return counts.astype(count_type(len(kernel)))
+
+
+def wrap_pad(board, radius):
+    """Pad the board axes with wrap-around copies of the opposite edges."""
+    pad = [(0, 0)] * (board.ndim - 2) + [(radius, radius), (radius, radius)]
+    return np.pad(board, pad, mode='wrap')
+
+
+def band_window(board, start, stop, radius):
+    """Rows start..stop of board with radius wrapped rows and columns around them.
+
+    Only those rows are read, so board can be a memmap or shared array.
+    """
+    height = board.shape[0]
+    if start - radius >= 0 and stop + radius <= height:
+        rows = board[start - radius:stop + radius]
+    else:
+        rows = np.take(board, np.arange(start - radius, stop + radius), axis=0, mode='wrap')
+    return np.pad(np.asarray(rows, dtype=np.uint8), ((0, 0), (radius, radius)), mode='wrap')
+
+
+def neighbor_counts(board, kernel, method=None):
+    """Wrap-around neighbor count for every cell, like count_neighbors(x, y)."""
+    radius = kernel_radius(kernel)
+    window = wrap_pad(board.astype(np.uint8, copy=False), radius)
+    return window_counts(window, kernel, radius, method)
+
+
+def rule_table(S, B, size):
+    """Next-state lookup table indexed by [cell, neighbors]."""
+    table = np.zeros((2, size + 1), dtype=np.uint8)
+    for neighbors in range(size + 1):
+        table[0, neighbors] = neighbors in B
+        table[1, neighbors] = neighbors in S
+    return table
+
+
+def generations_table(S, B, states, size):
+    """[state, neighbors] table for a Generations rule with states states.
+
+    0 is dead and 1 alive; a live cell that doesn't survive goes to 2 and
+    then decays one state per generation until it wraps back to 0.
+    """
+    table = np.zeros((states, size + 1), dtype=np.uint8)
+    dying = 2 % states
+    for neighbors in range(size + 1):
+        table[0, neighbors] = neighbors in B
+        table[1, neighbors] = 1 if neighbors in S else dying
+    for state in range(2, states):
+        table[state] = (state + 1) % states
+    return table
+
+
+# np.take() turns its index into a full-size intp array (8 bytes per cell),
+# so big boards are looked up a chunk at a time to keep that temporary small.
+LOOKUP_CHUNK = 1 << 18
+
+
+def lookup(table, cells, counts):
+    """table[cells, counts], done as one flat take() which is much faster."""
+    dtype = count_type(table.size)
+    index = cells.astype(dtype)
+    index *= table.shape[1]
+    index += counts
+    flat = table.ravel()
+    if index.size <= LOOKUP_CHUNK:
+        return np.take(flat, index)
+    new = np.empty(index.shape, dtype=table.dtype)
+    index_cells = index.reshape(-1)
+    new_cells = new.reshape(-1)
+    for start in range(0, index.size, LOOKUP_CHUNK):
+        stop = start + LOOKUP_CHUNK
+        np.take(flat, index_cells[start:stop], out=new_cells[start:stop])
+    return new
+
+
+def clear_border(board):
+    """Zero the one-cell border, which the non-wrapping loops never update."""
+    board[..., 0, :] = 0
+    board[..., -1, :] = 0
+    board[..., :, 0] = 0
+    board[..., :, -1] = 0
+
+
+def draw(new, rng):
+    """Turn looked-up probabilities into 0/1 cells; integer states pass through."""
+    if not np.issubdtype(new.dtype, np.floating):
+        return new
+    if rng is None:
+        raise ValueError("probability tables need an rng (numpy.random.Generator)")
+    return (rng.random(new.shape) < new).astype(np.uint8)
+
+
+def step_table(board, table, kernel, wrapping=False, rng=None):
+    """Next generation of board using a precomputed rule_table().
+
+    A float table holds the probability of each cell being alive next
+    generation and needs an rng (numpy.random.Generator) to draw from.
+    """
+    cells = board.astype(np.uint8, copy=False)
+    new = draw(lookup(table, cells, neighbor_counts(cells, kernel)), rng)
+    if not wrapping:
+        clear_border(new)
+    return new.astype(board.dtype, copy=False)
+
+
+def step_states(board, table, kernel, wrapping=False):
+    """Next generation of a multi-state uint8 board; only state 1 is counted."""
+    cells = np.asarray(board, dtype=np.uint8)
+    alive = (cells == 1).view(np.uint8)
+    new = lookup(table, cells, neighbor_counts(alive, kernel))
+    if not wrapping:
+        clear_border(new)
+    return new
+
+
+def step(board, S, B, kernel, wrapping=False):
+    """Next generation of board, same result as one call to update_board()."""
+    return step_table(board, rule_table(S, B, len(kernel)), kernel, wrapping)
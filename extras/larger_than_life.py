@@ -1,6 +1,10 @@
 import pygame
 import numpy as np
 import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from rules import Rule
 
 
 # The part that we will write in class. WRITE HERE
@@ -38,6 +42,10 @@ kernel = transform_kernel(kernel_array)
 S = range(34,59)
 B = range(34,46)
 
+# The rule is compiled once into a [cell, neighbors] table, so update_board()
+# does one lookup per cell (rule.next_state) instead of two membership tests.
+rule = Rule(S, B, kernel, wrapping)
+
 
 def count_neighbors(x, y):
     neighbors = 0
@@ -65,14 +73,7 @@ def update_board():
         for y in y_range:
             cell = board[x, y]
             neighbors = count_neighbors(x, y)
-            if neighbors in B and cell == 0:
-                cell = 1
-            elif neighbors in S and cell == 1:
-                cell = 1
-            elif cell == 1:
-                cell = 0
-
-            temp[x, y] = cell
+            temp[x, y] = rule.next_state(cell, neighbors)
 
     board[:] = temp  # Update the board with the new values
 
@@ -2,6 +2,7 @@ import pygame
 import numpy as np
 import os
 import math
+from synth import StreamingSynth
 
 # Initialize pygame mixer for sound
 pygame.mixer.init(frequency=22050)  # Set frequency to a standard value
@@ -26,69 +27,32 @@ def count_neighbors(x, y):
 x_range = range(1, dim[0]-1)
 y_range = range(1, dim[1]-1)
 
-# Function to generate a tone based on the frequency
-def generate_tone(frequency, duration=0.1, sample_rate=22050):
-    """Generates a sine wave tone based on the given frequency."""
-    t = np.linspace(0, duration, int(sample_rate * duration), endpoint=False)
-    waveform = np.sin(2 * np.pi * frequency * t) * 32767  # Generate sine wave
-    waveform = waveform.astype(np.int16)  # Convert to 16-bit PCM format
-    
-    # Convert to stereo by duplicating the waveform for the second channel
-    stereo_waveform = np.stack((waveform, waveform), axis=-1)  # Create a 2D array
-    
-    return pygame.sndarray.make_sound(stereo_waveform)
-
 def update_board():
     global board  # must explain what global means
 
     temp = np.zeros(dim)
-    births = 0
-    deaths = 0
 
     for x in x_range:
         for y in y_range:
             cell = board[x, y]
             neighbors = count_neighbors(x, y)
             if neighbors in B and cell == 0:
-                # Birth: cell becomes alive
                 temp[x, y] = 1
-                births += 1
             elif neighbors in S and cell == 1:
-                # Survival: cell stays alive
                 temp[x, y] = 1
-            else:
-                # Death: cell becomes dead
-                if cell == 1:  # Only count death if the cell was alive
-                    deaths += 1
-                    temp[x, y] = 0
 
+    # Births and deaths come from the change masks, the same way
+    # statstream.generation_stats() counts them.
+    births = int(np.count_nonzero((temp == 1) & (board != 1)))
+    deaths = int(np.count_nonzero((temp != 1) & (board == 1)))
     board[:] = temp  # Update the board with the new values
 
-    # If no changes (no births or deaths), don't play any tone
-    if births == 0 and deaths == 0:
-        return
-
-    # Calculate the frequency for the tone based on the number of births and deaths
-    if deaths !=0:
-        delta = births/deaths
-    else:
-        delta = 0
-
-    print(delta)
-    base_frequency = 220# Frequency of A4 note (440 Hz) as the base
-    frequency = base_frequency ** delta# Modify frequency based on the difference
-
-    # Ensure the frequency stays within a comfortable range
-    frequency = max(100, min(frequency, 800))  # Limit frequency to a range between 100Hz and 800Hz
-
-    # Add smoothing to avoid abrupt changes in frequency
-    if hasattr(update_board, 'last_frequency'):
-        frequency = 0.8 * update_board.last_frequency + 0.2 * frequency  # Smooth the frequency transition
-    update_board.last_frequency = frequency
+    if births or deaths:
+        print(births / deaths if deaths else 0)
 
-    # Generate and play the tone continuously
-    tone = generate_tone(frequency)
-    tone.play(maxtime=0)  # Play the tone without stopping, maxtime=0 means it won't stop automatically
+    # The synth smooths the frequency and keeps playing it until the next
+    # change, and plays silence when nothing changed.
+    synth({'births': births, 'deaths': deaths})
 
 def fill_board_random(board):
     board[:, :] = np.random.choice([0, 1], size=board.shape)
@@ -147,7 +111,10 @@ def draw_board(screen, board, show_gridlines):
     pygame.display.flip()
 
 def main():
+    global synth
     pygame.init()
+    synth = StreamingSynth()
+    synth.start()
     screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
     pygame.display.set_caption("Adaptive Board Viewer")
     clock = pygame.time.Clock()
@@ -190,7 +157,10 @@ def main():
 
         if not paused:
             update_board()
+        else:
+            synth.set_frequency(None)
 
+    synth.stop()
     pygame.quit()
 
 main()
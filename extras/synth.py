@@ -0,0 +1,131 @@
+import threading
+
+import numpy as np
+import pygame
+
+# Streaming tone for music.py. Instead of building a new Sound every
+# generation, a few Sounds are made once and used as a ring buffer: each one
+# is refilled in place and queued on the same mixer Channel. The oscillator
+# keeps its phase from one buffer to the next, so frequency changes don't
+# click.
+
+TABLE_SIZE = 4096
+
+
+def frequency_for(births, deaths):
+    """The tone music.py plays for a generation, or None for silence."""
+    if births == 0 and deaths == 0:
+        return None
+    delta = births / deaths if deaths != 0 else 0
+    frequency = 220 ** delta
+    return max(100, min(frequency, 800))  # keep it between 100Hz and 800Hz
+
+
+class StreamingSynth:
+    """Phase-continuous sine oscillator feeding one persistent Channel."""
+
+    def __init__(self, chunk=1024, buffers=4, volume=0.5, smoothing=0.2):
+        sample_rate, size, channels = pygame.mixer.get_init()
+        self.sample_rate = sample_rate
+        self.chunk = chunk
+        self.volume = volume
+        self.smoothing = smoothing
+        self.table = (np.sin(2 * np.pi * np.arange(TABLE_SIZE) / TABLE_SIZE) * 32767).astype(np.int16)
+
+        shape = (chunk, channels) if channels > 1 else (chunk,)
+        self.sounds = [pygame.sndarray.make_sound(np.zeros(shape, dtype=np.int16))
+                       for _ in range(max(buffers, 3))]
+        self.samples = [pygame.sndarray.samples(sound) for sound in self.sounds]
+        self.channel = pygame.mixer.find_channel(True)
+        self.next = 0
+
+        self.frequency = None  # what is playing now
+        self.target = None  # what set_frequency() asked for
+        self.smoothed = None  # last frequency after smoothing, kept over silences
+        self.phase = 0.0
+        self._steps = {}  # wavetable index offsets, one per frequency
+        self._index = np.zeros(chunk)
+        self._int_index = np.zeros(chunk, dtype=np.intp)
+        self._mono = np.zeros(chunk, dtype=np.int16)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._running = False
+
+    def set_frequency(self, frequency):
+        """Glide towards frequency (None plays silence)."""
+        with self._lock:
+            if frequency is not None:
+                if self.smoothed is not None:
+                    frequency = (1 - self.smoothing) * self.smoothed + self.smoothing * frequency
+                self.smoothed = frequency
+            self.target = frequency
+
+    def __call__(self, record):
+        """Stats subscriber: play the tone for a record's births and deaths.
+
+        Works with statstream.publish() or any dict with 'births' and 'deaths'.
+        """
+        births, deaths = record['births'], record['deaths']
+        self.set_frequency(frequency_for(births, deaths) if births or deaths else None)
+
+    def _steps_for(self, frequency):
+        # Repeated frequencies reuse the same per-sample table offsets.
+        key = round(frequency, 1)
+        steps = self._steps.get(key)
+        if steps is None:
+            if len(self._steps) > 256:
+                self._steps.clear()
+            steps = self._steps[key] = np.arange(self.chunk) * (key * TABLE_SIZE / self.sample_rate)
+        return key, steps
+
+    def _fill(self, samples):
+        with self._lock:
+            frequency = self.target
+        if frequency is None:
+            samples[...] = 0
+            self.frequency = None
+            return
+        key, steps = self._steps_for(frequency)
+        np.add(steps, self.phase, out=self._index)
+        np.mod(self._index, TABLE_SIZE, out=self._index)
+        np.copyto(self._int_index, self._index, casting='unsafe')
+        np.take(self.table, self._int_index, out=self._mono)
+        if self.volume != 1:
+            np.multiply(self._mono, self.volume, out=self._mono, casting='unsafe')
+        if samples.ndim == 1:
+            samples[:] = self._mono
+        else:
+            samples[:] = self._mono[:, None]
+        self.phase = (self.phase + self.chunk * key * TABLE_SIZE / self.sample_rate) % TABLE_SIZE
+        self.frequency = key
+
+    def pump(self):
+        """Keep the channel fed; cheap to call as often as you like."""
+        if not self.channel.get_busy():
+            self._fill(self.samples[self.next])
+            self.channel.play(self.sounds[self.next])
+            self.next = (self.next + 1) % len(self.sounds)
+        if self.channel.get_queue() is None:
+            self._fill(self.samples[self.next])
+            self.channel.queue(self.sounds[self.next])
+            self.next = (self.next + 1) % len(self.sounds)
+
+    def start(self):
+        """Pump from a background thread so slow frames don't starve the audio."""
+        self._running = True
+        interval = self.chunk / self.sample_rate / 4
+        clock = threading.Event()
+
+        def feed():
+            while self._running:
+                self.pump()
+                clock.wait(interval)
+
+        self._thread = threading.Thread(target=feed, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+        self.channel.stop()
@@ -0,0 +1,248 @@
+import numpy as np
+
+# Hashlife: the board is a quadtree where identical squares are the same node,
+# and the result of running a square forward is remembered. Patterns with a
+# lot of repetition (like the gliders from glider_gun.npy) can then be jumped
+# forward 2^k generations at a time.
+#
+# The plane is unbounded, so edges never wrap and nothing is cleared at the
+# border. Coordinates are (x, y) the same way board[x, y] is indexed, measured
+# from the top-left corner of the board that was loaded.
+
+
+class Node:
+    """A 2^level square. Level 0 nodes are single cells."""
+
+    __slots__ = ('nw', 'ne', 'sw', 'se', 'level', 'population')
+
+    def __init__(self, nw, ne, sw, se, level, population):
+        self.nw = nw
+        self.ne = ne
+        self.sw = sw
+        self.se = se
+        self.level = level
+        self.population = population
+
+
+class Hashlife:
+    """Quadtree universe for a totalistic Moore rule (B3/S23 by default)."""
+
+    def __init__(self, S=(2, 3), B=(3,), max_nodes=2_000_000):
+        self.S = set(S)
+        self.B = set(B)
+        if 0 in self.B:
+            raise ValueError("hashlife can't run rules with birth on 0 neighbors")
+        self.max_nodes = max_nodes
+        self.off = Node(None, None, None, None, 0, 0)
+        self.on = Node(None, None, None, None, 0, 1)
+        self._nodes = {}
+        self._empty = [self.off]
+        self._results = {}
+        self.generation = 0
+        self.root = self.empty(3)
+        self.origin = (0, 0)
+
+    # Node cache
+
+    def join(self, nw, ne, sw, se):
+        """The one canonical node with these four children."""
+        key = (nw, ne, sw, se)
+        node = self._nodes.get(key)
+        if node is None:
+            population = nw.population + ne.population + sw.population + se.population
+            node = Node(nw, ne, sw, se, nw.level + 1, population)
+            self._nodes[key] = node
+        return node
+
+    def empty(self, level):
+        while len(self._empty) <= level:
+            e = self._empty[-1]
+            self._empty.append(self.join(e, e, e, e))
+        return self._empty[level]
+
+    def centre(self, node):
+        """Node one level up with node in the middle."""
+        e = self.empty(node.level - 1)
+        return self.join(self.join(e, e, e, node.nw), self.join(e, e, node.ne, e),
+                         self.join(e, node.sw, e, e), self.join(node.se, e, e, e))
+
+    def cache_size(self):
+        return len(self._nodes) + len(self._results)
+
+    def collect(self):
+        """Drop every cached node and result not needed by the current root."""
+        old_empty = len(self._empty)
+        self._nodes = {}
+        self._results = {}
+        self._empty = [self.off]
+        self.empty(old_empty - 1)
+        rebuilt = {self.off: self.off, self.on: self.on}
+
+        def rebuild(node):
+            done = rebuilt.get(node)
+            if done is None:
+                done = self.join(rebuild(node.nw), rebuild(node.ne),
+                                 rebuild(node.sw), rebuild(node.se))
+                rebuilt[node] = done
+            return done
+
+        self.root = rebuild(self.root)
+
+    # Stepping
+
+    def _life_4x4(self, node):
+        """Centre 2x2 of a level-2 node after one generation."""
+        cells = [[0] * 4 for _ in range(4)]
+        for qx, qy, quad in ((0, 0, node.nw), (0, 2, node.ne), (2, 0, node.sw), (2, 2, node.se)):
+            cells[qx][qy] = quad.nw.population
+            cells[qx][qy + 1] = quad.ne.population
+            cells[qx + 1][qy] = quad.sw.population
+            cells[qx + 1][qy + 1] = quad.se.population
+        new = []
+        for x in (1, 2):
+            for y in (1, 2):
+                neighbors = sum(cells[x + dx][y + dy] for dx in (-1, 0, 1) for dy in (-1, 0, 1)) - cells[x][y]
+                alive = neighbors in self.S if cells[x][y] else neighbors in self.B
+                new.append(self.on if alive else self.off)
+        return self.join(*new)
+
+    def successor(self, node, j):
+        """Centre half of node after 2^j generations (j <= node.level - 2)."""
+        if node.population == 0:
+            return node.nw
+        key = (node, j)
+        result = self._results.get(key)
+        if result is not None:
+            return result
+        if node.level == 2:
+            result = self._life_4x4(node)
+        else:
+            join = self.join
+            nw, ne, sw, se = node.nw, node.ne, node.sw, node.se
+            # Nine overlapping squares of half the size...
+            c1 = self.successor(nw, j)
+            c2 = self.successor(join(nw.ne, ne.nw, nw.se, ne.sw), j)
+            c3 = self.successor(ne, j)
+            c4 = self.successor(join(nw.sw, nw.se, sw.nw, sw.ne), j)
+            c5 = self.successor(join(nw.se, ne.sw, sw.ne, se.nw), j)
+            c6 = self.successor(join(ne.sw, ne.se, se.nw, se.ne), j)
+            c7 = self.successor(sw, j)
+            c8 = self.successor(join(sw.ne, se.nw, sw.se, se.sw), j)
+            c9 = self.successor(se, j)
+            quads = (join(c1, c2, c4, c5), join(c2, c3, c5, c6),
+                     join(c4, c5, c7, c8), join(c5, c6, c8, c9))
+            if j < node.level - 2:
+                # ...already far enough along, so just take their centres.
+                result = join(*(join(q.nw.se, q.ne.sw, q.sw.ne, q.se.nw) for q in quads))
+            else:
+                # ...only half way, so run the four combined squares again.
+                result = join(*(self.successor(q, j) for q in quads))
+        self._results[key] = result
+        return result
+
+    def _padded(self, node):
+        """True if every live cell is inside the middle half of node."""
+        inner = (node.nw.se.population + node.ne.sw.population +
+                 node.sw.ne.population + node.se.nw.population)
+        return inner == node.population
+
+    def step_pow2(self, j):
+        """Advance the universe by exactly 2^j generations."""
+        root = self.root
+        while root.level < j + 2 or not self._padded(root):
+            root = self.centre(root)
+            self.origin = (self.origin[0] - 2 ** (root.level - 2), self.origin[1] - 2 ** (root.level - 2))
+        root = self.centre(root)
+        self.origin = (self.origin[0] - 2 ** (root.level - 2), self.origin[1] - 2 ** (root.level - 2))
+        self.root = self.successor(root, j)
+        self.origin = (self.origin[0] + 2 ** (root.level - 2), self.origin[1] + 2 ** (root.level - 2))
+        self.generation += 2 ** j
+        if self.cache_size() > self.max_nodes:
+            self.collect()
+
+    def advance(self, generations):
+        """Advance by any number of generations, one power of two at a time."""
+        j = 0
+        while generations:
+            if generations & 1:
+                self.step_pow2(j)
+            generations >>= 1
+            j += 1
+
+    # Conversion
+
+    def _from_array(self, board, level):
+        if not board.any():
+            return self.empty(level)
+        if level == 0:
+            return self.on
+        half = 2 ** (level - 1)
+        return self.join(self._from_array(board[:half, :half], level - 1),
+                         self._from_array(board[:half, half:], level - 1),
+                         self._from_array(board[half:, :half], level - 1),
+                         self._from_array(board[half:, half:], level - 1))
+
+    def set_board(self, board, origin=(0, 0)):
+        """Replace the universe with an ndarray board placed at origin."""
+        level = max(3, int(np.ceil(np.log2(max(board.shape + (1,))))))
+        size = 2 ** level
+        square = np.zeros((size, size), dtype=bool)
+        square[:board.shape[0], :board.shape[1]] = board != 0
+        self.root = self._from_array(square, level)
+        self.origin = origin
+        self.generation = 0
+
+    def load(self, filename):
+        """Load a pattern saved by save_board(), e.g. 'bugs/glider_gun.npy'."""
+        self.set_board(np.load(filename))
+
+    def population(self):
+        return self.root.population
+
+    def bounds(self):
+        """(x0, y0, x1, y1) of the live cells, inclusive, or None if empty."""
+        if self.root.population == 0:
+            return None
+        extents = {}
+
+        def extent(node):
+            # Shared subtrees are only measured once.
+            if node.level == 0:
+                return (0, 0, 0, 0)
+            found = extents.get(node)
+            if found is None:
+                half = 2 ** (node.level - 1)
+                boxes = [(x + dx, y + dy, x + dx2, y + dy2)
+                         for child, x, y in ((node.nw, 0, 0), (node.ne, 0, half),
+                                             (node.sw, half, 0), (node.se, half, half))
+                         if child.population
+                         for dx, dy, dx2, dy2 in (extent(child),)]
+                found = (min(b[0] for b in boxes), min(b[1] for b in boxes),
+                         max(b[2] for b in boxes), max(b[3] for b in boxes))
+                extents[node] = found
+            return found
+
+        x0, y0, x1, y1 = extent(self.root)
+        ox, oy = self.origin
+        return x0 + ox, y0 + oy, x1 + ox, y1 + oy
+
+    def to_array(self, x0, y0, height, width, dtype=int):
+        """The window board[x0:x0+height, y0:y0+width] as an ndarray."""
+        out = np.zeros((height, width), dtype=dtype)
+
+        def fill(node, x, y):
+            size = 2 ** node.level
+            if node.population == 0 or x >= x0 + height or y >= y0 + width \
+                    or x + size <= x0 or y + size <= y0:
+                return
+            if node.level == 0:
+                out[x - x0, y - y0] = 1
+                return
+            half = size // 2
+            fill(node.nw, x, y)
+            fill(node.ne, x, y + half)
+            fill(node.sw, x + half, y)
+            fill(node.se, x + half, y + half)
+
+        fill(self.root, *self.origin)
+        return out
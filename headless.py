@@ -0,0 +1,239 @@
+import argparse
+import csv
+import os
+import sys
+import time
+
+import numpy as np
+
+import statstream
+import stochastic
+from checkpoint import Checkpointer, load_checkpoint, restore
+from cycles import CycleDetector
+from resultcache import ResultCache
+from rules import Rule
+from trajectory import TrajectoryWriter
+
+# Run a board for N generations with no window and no frame cap, then save the
+# final board and a per-generation stats log. This never imports pygame, so it
+# works on servers and in CI:
+#
+#   python -m headless bugs/glider_gun.npy -n 1000 -o final.npy --stats stats.csv
+#   python -m headless board.npy --rule 'R5,C0,M0,S34..58,B34..45,NM'
+#   python -m headless bugs/glider_gun.npy -n 10000 --cache .cache/results
+#   python -m headless big.npy -n 1000000 --checkpoint big.ckpt.npz --resume
+
+
+def parse_counts(text):
+    """'2,3' -> [2, 3] and '34..58' -> range(34, 59); pieces can be mixed."""
+    counts = []
+    for part in text.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '..' in part:
+            low, high = part.split('..')
+            counts.extend(range(int(low), int(high) + 1))
+        else:
+            counts.append(int(part))
+    return counts
+
+
+def box_kernel(radius):
+    """Square neighborhood of the given radius without the center cell."""
+    return [(dx, dy) for dx in range(-radius, radius + 1)
+            for dy in range(-radius, radius + 1) if dx or dy]
+
+
+def run(board, rule, generations, on_generation=None, cycles=None, rng=None, start=0):
+    """Step board up to generation generations with a Rule; on_generation(gen, old, new) sees each step.
+
+    board is generation start (0 unless resuming). rng is passed to the rule
+    for stochastic rules. cycles='stop' ends the run as soon as the board
+    repeats and cycles='skip' jumps over whole periods to land on the same
+    board as a full run.
+    Returns (board, generation, (transient, period) or None, steps computed).
+    """
+    detector = CycleDetector() if cycles else None
+    if detector is not None:
+        detector.observe(start, board)
+    found = None
+    generation = start
+    steps = 0
+    while generation < generations:
+        new = rule.step(board, rng)
+        generation += 1
+        steps += 1
+        if on_generation is not None:
+            on_generation(generation, board, new)
+        board = new
+        if detector is not None:
+            found = detector.observe(generation, board)
+            if found is not None:
+                if cycles == 'stop':
+                    break
+                # The board at the end is the board a whole number of periods
+                # back, so only the leftover part of a period has to be run.
+                period = found[1]
+                generation += (generations - generation) // period * period
+                detector = None
+    return board, generation, found, steps
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='headless', description="Run a board without a window.")
+    parser.add_argument('board', help="board saved with save_board(), e.g. bugs/glider_gun.npy")
+    parser.add_argument('-n', '--generations', type=int, default=100)
+    parser.add_argument('-S', default='2,3', help="survival counts, e.g. 2,3 or 34..58")
+    parser.add_argument('-B', default='3', help="birth counts, e.g. 3 or 34..45")
+    parser.add_argument('-r', '--radius', type=int, default=1,
+                        help="square neighborhood radius (5 for Bosco's rule)")
+    parser.add_argument('--rule', help="rule string like B3/S23 or R5,C0,M1,S34..58,B34..45,NM "
+                                       "(replaces -S, -B and -r)")
+    parser.add_argument('--quantum', metavar='SIGMAS',
+                        help="quantum rule with these birth/survival sigmas, e.g. 0.34 or 0.34,0.3,0.3 "
+                             "(replaces -S, -B, -r and --rule)")
+    parser.add_argument('--seed', type=int, help="random seed for --quantum")
+    parser.add_argument('--wrap', action='store_true', help="wrap around the edges")
+    parser.add_argument('-o', '--output', help="where to save the final board (.npy)")
+    parser.add_argument('--stats', help="CSV file for per-generation stats (see statstream.COLUMNS)")
+    parser.add_argument('--record', help="record every generation to a trajectory file")
+    parser.add_argument('--cycles', choices=['stop', 'skip'],
+                        help="when the board starts repeating, stop there or skip to the end")
+    parser.add_argument('--cache', metavar='DIR',
+                        help="reuse and store checkpoints of this run in a result cache")
+    parser.add_argument('--cache-size', type=float, default=1024, help="cache size limit in MB")
+    parser.add_argument('--cache-interval', type=int, default=1000,
+                        help="generations between cached checkpoints")
+    parser.add_argument('--checkpoint', metavar='FILE',
+                        help="save the board, generation, rule and random state here while running")
+    parser.add_argument('--checkpoint-every', type=int, metavar='N',
+                        help="generations between checkpoints")
+    parser.add_argument('--checkpoint-seconds', type=float, metavar='T',
+                        help="seconds between checkpoints (default 600 if --checkpoint-every isn't given)")
+    parser.add_argument('--resume', action='store_true',
+                        help="continue from --checkpoint if it exists; -n is still the total")
+    args = parser.parse_args(argv)
+    if args.record and args.cycles == 'skip':
+        parser.error("--record needs every generation, it can't be used with --cycles skip")
+    if args.cache and (args.stats or args.record or args.cycles or args.checkpoint):
+        parser.error("--cache skips cached generations, it can't be used with "
+                     "--stats, --record, --cycles or --checkpoint")
+    if args.resume and not args.checkpoint:
+        parser.error("--resume needs --checkpoint")
+    if args.resume and args.record:
+        parser.error("trajectory files can't be appended to, --record can't be used with --resume")
+
+    board = np.load(args.board)
+    rng = np.random.default_rng(args.seed)
+    if args.quantum:
+        sigmas = [float(sigma) for sigma in args.quantum.split(',')]
+        if len(sigmas) == 1:
+            sigmas *= 3
+        if len(sigmas) != 3:
+            parser.error("--quantum takes one sigma or three (birth, survival 2, survival 3)")
+        rule = stochastic.quantum_rule(*sigmas, wrapping=args.wrap)
+    elif args.rule:
+        try:
+            rule = Rule.parse(args.rule, args.wrap)
+        except ValueError as error:
+            parser.error(str(error))
+    else:
+        rule = Rule(parse_counts(args.S), parse_counts(args.B), box_kernel(args.radius), args.wrap)
+
+    if args.cycles and np.issubdtype(np.asarray(rule.table).dtype, np.floating):
+        parser.error("a repeated board doesn't mean a cycle for random rules, "
+                     "--cycles can't be used with --quantum")
+
+    first = 0
+    if args.resume and os.path.exists(args.checkpoint):
+        try:
+            board, first = restore(load_checkpoint(args.checkpoint), rule, rng)
+        except ValueError as error:
+            parser.error(str(error))
+        print(f"resuming from generation {first}", file=sys.stderr)
+
+    handlers = []
+    stats_file = None
+    if args.stats:
+        rows = []
+        if first and os.path.exists(args.stats):
+            # Keep the stats up to the checkpoint; later rows get written again.
+            # A run killed mid-write can leave a cut-off last line, so only
+            # whole lines with every column count.
+            with open(args.stats, newline='') as file:
+                text = file.read()
+            lines = text[:text.rfind('\n') + 1].splitlines()
+            rows = [row for row in csv.reader(lines)
+                    if len(row) == len(statstream.COLUMNS)
+                    and (not row[0].isdigit() or int(row[0]) <= first)]
+        stats_file = open(args.stats, 'w', newline='')
+        writer = statstream.CsvWriter(stats_file, header=not rows)
+        if rows:
+            writer.writer.writerows(rows)
+        else:
+            writer(statstream.generation_stats(first, board, board))
+        handlers.append(lambda generation, old, new:
+                        writer(statstream.generation_stats(generation, old, new)))
+
+    recorder = None
+    if args.record:
+        recorder = TrajectoryWriter(args.record, board.shape, states=rule.states)
+        recorder.append(board)
+        handlers.append(lambda generation, old, new: recorder.append(new))
+
+    checkpointer = None
+    if args.checkpoint:
+        seconds = args.checkpoint_seconds
+        if seconds is None and args.checkpoint_every is None:
+            seconds = 600
+        checkpointer = Checkpointer(args.checkpoint, rule, args.checkpoint_every, seconds)
+        checkpointer.due(first)
+
+        def save_checkpoint(generation, old, new):
+            if checkpointer.offer(generation, new, rng) and stats_file is not None:
+                stats_file.flush()
+        handlers.append(save_checkpoint)
+
+    def on_generation(generation, old, new):
+        for handler in handlers:
+            handler(generation, old, new)
+
+    start = time.perf_counter()
+    if args.cache:
+        cache = ResultCache(args.cache, int(args.cache_size * 2**20), args.cache_interval)
+        try:
+            board, resumed = cache.run(board, rule, args.generations)
+        except ValueError as error:
+            parser.error(str(error))
+        generation, found, steps = args.generations, None, args.generations - resumed
+        if resumed:
+            print(f"resumed from cached generation {resumed}", file=sys.stderr)
+    else:
+        board, generation, found, steps = run(board, rule, args.generations,
+                                              on_generation if handlers else None, args.cycles, rng,
+                                              first)
+    seconds = time.perf_counter() - start
+    if checkpointer is not None:
+        checkpointer.offer(generation, board, rng, force=True)
+        checkpointer.close()
+    if stats_file is not None:
+        stats_file.close()
+    if recorder is not None:
+        recorder.close()
+
+    if args.output:
+        np.save(args.output, board)
+    rate = steps / seconds if seconds else float('inf')
+    print(f"{generation} generations in {seconds:.2f}s ({rate:.0f} gen/s), "
+          f"population {int((board == 1).sum())}", file=sys.stderr)
+    if found is not None:
+        transient, period = found
+        print(f"board repeats from generation {transient} with period {period}", file=sys.stderr)
+        if args.cycles == 'skip':
+            print(f"skipped ahead to generation {generation} after computing {steps}",
+                  file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import collections
+import csv
+import time
+
+import numpy as np
+
+# Timers for the viewer loop. Every phase of a frame (events, update, draw,
+# clock tick) and every engine step records its duration into a fixed-size
+# ring of recent samples, which costs one perf_counter() call and a deque
+# append. Percentiles are only worked out when something asks for them: the
+# HUD a few times a second, or summary()/write_csv() on exit.
+#
+# Population, births and deaths are counted per generation when counting is
+# on, since that needs a couple of passes over the board.
+
+
+class Instruments:
+    """Rolling per-phase timings plus population/births/deaths counters."""
+
+    def __init__(self, window=1000, counting=True):
+        self.window = window
+        self.counting = counting
+        self.samples = {}
+        self.generations = 0
+        self.population = 0
+        self.births = 0
+        self.deaths = 0
+        self.total_births = 0
+        self.total_deaths = 0
+
+    def add(self, name, start):
+        """Record the time since start (a time.perf_counter() value) under name."""
+        seconds = time.perf_counter() - start
+        samples = self.samples.get(name)
+        if samples is None:
+            samples = self.samples[name] = collections.deque(maxlen=self.window)
+        samples.append(seconds)
+        return seconds
+
+    def count(self, old, new):
+        """Update the counters for one generation from old to new."""
+        self.generations += 1
+        if not self.counting:
+            return
+        old_alive = old == 1
+        new_alive = new == 1
+        self.population = int(np.count_nonzero(new_alive))
+        self.births = int(np.count_nonzero(new_alive & ~old_alive))
+        self.deaths = int(np.count_nonzero(old_alive & ~new_alive))
+        self.total_births += self.births
+        self.total_deaths += self.deaths
+
+    def summary(self):
+        """{phase: {'count', 'mean', 'p50', 'p99', 'max'}} with times in milliseconds."""
+        result = {}
+        for name, samples in list(self.samples.items()):
+            if not samples:
+                continue
+            values = np.array(samples) * 1000
+            p50, p99 = np.percentile(values, [50, 99])
+            result[name] = {'count': len(values), 'mean': values.mean(),
+                            'p50': p50, 'p99': p99, 'max': values.max()}
+        return result
+
+    def lines(self):
+        """Text lines for the on-screen HUD."""
+        lines = [f"{name:<7} p50 {row['p50']:6.2f}  p99 {row['p99']:6.2f} ms"
+                 for name, row in self.summary().items()]
+        lines.append(f"gen {self.generations}  pop {self.population}")
+        lines.append(f"births {self.births}  deaths {self.deaths}")
+        return lines
+
+    def write_csv(self, filename):
+        """Per-phase summary plus the counters, one row each."""
+        with open(filename, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(['phase', 'count', 'mean_ms', 'p50_ms', 'p99_ms', 'max_ms'])
+            for name, row in self.summary().items():
+                writer.writerow([name, row['count'], f"{row['mean']:.4f}", f"{row['p50']:.4f}",
+                                 f"{row['p99']:.4f}", f"{row['max']:.4f}"])
+            writer.writerow([])
+            writer.writerow(['counter', 'value'])
+            for name in ('generations', 'population', 'total_births', 'total_deaths'):
+                writer.writerow([name, getattr(self, name)])
@@ -1,7 +1,14 @@
 from lesson import *
+import lesson
 import pygame
 import numpy as np
 import os
+import time
+import cProfile
+import engine
+from instrument import Instruments
+from render import BoardRenderer, fade_palette
+from simthread import Simulation
 # Fixed window size
 WINDOW_WIDTH = 800
 WINDOW_HEIGHT = 800
@@ -19,69 +26,285 @@ COLOR_GRID = (40, 40, 40)
 if 'fps' not in locals() and 'fps' not in globals():
     fps = 10
 
+# threaded = True steps the board in a background thread at sim_rate
+# generations per second (None = as fast as possible), while fps only
+# limits how often the window is redrawn.
+if 'threaded' not in locals() and 'threaded' not in globals():
+    threaded = False
+if 'sim_rate' not in locals() and 'sim_rate' not in globals():
+    sim_rate = None
+
+# rule = rules.Rule.parse('/2/3') (Brian's Brain) steps the board with that
+# rule instead of update_board(). Multi-state rules keep the board as uint8
+# states and draw dying cells in fading colors.
+if 'rule' not in locals() and 'rule' not in globals():
+    rule = None
+
+# Instrumentation: every phase of the loop and every step is timed. i toggles
+# a HUD with p50/p99 times and population/births/deaths (show_hud = True
+# starts with it on). timings_file = 'timings.csv' saves the timings on exit
+# and profile_file = 'viewer.prof' runs the session under cProfile (read it
+# with pstats).
+if 'show_hud' not in locals() and 'show_hud' not in globals():
+    show_hud = False
+if 'timings_file' not in locals() and 'timings_file' not in globals():
+    timings_file = None
+if 'profile_file' not in locals() and 'profile_file' not in globals():
+    profile_file = None
+
+instruments = Instruments(counting=show_hud or bool(timings_file))
+
+renderer = None
+
 def draw_board(screen, board, show_gridlines):
+    global renderer
+    if renderer is None or renderer.shape != board.shape:
+        states = rule.states if rule is not None else 2
+        renderer = BoardRenderer(board.shape, CELL_WIDTH, CELL_HEIGHT,
+                                 fade_palette(states, COLOR_OFF, COLOR_ON),
+                                 COLOR_GRID, (WINDOW_WIDTH, WINDOW_HEIGHT))
     screen.fill(COLOR_BG)
-    for y in range(dim[1]):
-        for x in range(dim[0]):
-            rect = pygame.Rect(x * CELL_WIDTH, y * CELL_HEIGHT, CELL_WIDTH, CELL_HEIGHT)
-            color = COLOR_ON if board[y, x] else COLOR_OFF
-            pygame.draw.rect(screen, color, rect)
-
-    if show_gridlines:
-        for x in range(0, WINDOW_WIDTH, CELL_WIDTH):
-            pygame.draw.line(screen, COLOR_GRID, (x, 0), (x, WINDOW_HEIGHT))
-        for y in range(0, WINDOW_HEIGHT, CELL_HEIGHT):
-            pygame.draw.line(screen, COLOR_GRID, (0, y), (WINDOW_WIDTH, y))
-
+    renderer.draw(screen, board, show_gridlines)
     pygame.display.flip()
 
-def main():
+def draw_changes(screen, board, changed, show_gridlines):
+    """Repaint just the changed cells, falling back to a full draw."""
+    rects = None
+    if renderer is not None and renderer.shape == board.shape:
+        rects = renderer.draw_cells(screen, board, changed, show_gridlines)
+    if rects is None:
+        draw_board(screen, board, show_gridlines)
+    elif rects:
+        pygame.display.update(rects)
+
+def step_board(board):
+    start = time.perf_counter()
+    if rule is not None:
+        new = rule.step(board)
+    else:
+        new = engine.step(board, S, B, kernel, globals().get('wrapping', False))
+    instruments.add('step', start)
+    instruments.count(board, new)
+    return new
+
+def use_rule_states():
+    """Multi-state rules keep the board as uint8 states, e.g. after load_board()."""
     global board
+    if rule is not None and rule.states > 2:
+        board = board.astype(np.uint8)
+        lesson.board = board  # save_board() and load_board() use the lesson's global
+
+def toggle(cell):
+    """Mouse click: any state but alive becomes alive, alive becomes dead."""
+    return 0 if cell == 1 else 1
+
+def draw_rate(screen, font, text):
+    """Draw the gens/sec label in the top-left corner and return its rect."""
+    rect = pygame.Rect(0, 0, 150, 24)
+    screen.fill(COLOR_BG, rect)
+    screen.blit(font.render(text, True, COLOR_ON), (4, 4))
+    return rect
+
+def draw_hud(screen, font):
+    """Draw the instrumentation HUD in the bottom-left corner and return its rect."""
+    lines = instruments.lines()
+    rect = pygame.Rect(0, WINDOW_HEIGHT - 18 * len(lines) - 8, 300, 18 * len(lines) + 8)
+    screen.fill(COLOR_BG, rect)
+    for i, line in enumerate(lines):
+        screen.blit(font.render(line, True, COLOR_ON), (4, rect.y + 4 + 18 * i))
+    return rect
+
+def start_profile():
+    if not profile_file:
+        return None
+    profile = cProfile.Profile()
+    profile.enable()
+    return profile
+
+def finish_instruments(profile):
+    """Save the profile and timings asked for by profile_file and timings_file."""
+    if profile is not None:
+        profile.disable()
+        profile.dump_stats(profile_file)
+        print(f"Profile saved to {profile_file}")
+    if timings_file:
+        instruments.write_csv(timings_file)
+        print(f"Timings saved to {timings_file}")
+
+def main_threaded():
+    global board, show_hud
     pygame.init()
     screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
     pygame.display.set_caption("Adaptive Board Viewer")
     clock = pygame.time.Clock()
+    font = pygame.font.Font(None, 24)
+    hud_font = pygame.font.Font(None, 20)
+
+    sim = Simulation(board, step_board, sim_rate)
+    sim.start()
+    show_gridlines = True
+    running = True
+    redraw = True
+    shown = None
+
+    while running:
+        start = time.perf_counter()
+        clock.tick(fps)  # only limits drawing, not the simulation
+        instruments.add('tick', start)
+
+        start = time.perf_counter()
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+
+            elif event.type == pygame.VIDEOEXPOSE:
+                redraw = True
+
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_SPACE:
+                    sim.set_paused(not sim.paused)
+                elif event.key == pygame.K_g:
+                    show_gridlines = not show_gridlines
+                    redraw = True
+                elif event.key == pygame.K_i:
+                    show_hud = not show_hud
+                    instruments.counting = show_hud or bool(timings_file)
+                    redraw = True
+                elif event.key == pygame.K_c:
+                    sim.edit(clear_board)
+                elif event.key == pygame.K_r:
+                    sim.edit(fill_board_random)
+                elif event.key == pygame.K_s:
+                    board[:] = sim.latest()[1]
+                    save_board()
+                elif event.key == pygame.K_l:
+                    board = load_board()
+                    use_rule_states()
+                    sim.replace(board)
+                    redraw = True
+
+            elif sim.paused and event.type == pygame.MOUSEBUTTONDOWN:
+                x, y = pygame.mouse.get_pos()
+                board_x = x // CELL_WIDTH
+                board_y = y // CELL_HEIGHT
+                if 0 <= board_x < dim[0] and 0 <= board_y < dim[1]:
+                    sim.toggle(board_y, board_x)  # applied between generations
+
+        instruments.add('events', start)
+
+        # Only the newest finished generation is drawn; any in between are skipped.
+        start = time.perf_counter()
+        generation, latest = sim.latest()
+        if redraw or shown is None or shown.shape != latest.shape:
+            draw_board(screen, latest, show_gridlines)
+            redraw = False
+        elif latest is not shown:
+            draw_changes(screen, latest, latest != shown, show_gridlines)
+        shown = latest
+        text = f"gen {generation}  {sim.gens_per_second():.0f} gen/s"
+        pygame.display.update(draw_rate(screen, font, text))
+        if show_hud:
+            pygame.display.update(draw_hud(screen, hud_font))
+        instruments.add('draw', start)
+
+    sim.stop()
+    pygame.quit()
+
+def main():
+    global board, show_hud
+    use_rule_states()
+    profile = start_profile()
+    if threaded:
+        main_threaded()
+        finish_instruments(profile)
+        return
+    pygame.init()
+    screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+    pygame.display.set_caption("Adaptive Board Viewer")
+    clock = pygame.time.Clock()
+    hud_font = pygame.font.Font(None, 20)
 
     paused = True
     show_gridlines = True
     running = True
+    redraw = True  # full redraw needed
+    changed = None  # cells that changed since the last frame
 
     while running:
+        start = time.perf_counter()
         clock.tick(fps)  # Limit to 30 FPS
+        instruments.add('tick', start)
 
+        start = time.perf_counter()
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
 
+            elif event.type == pygame.VIDEOEXPOSE:
+                redraw = True
+
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_SPACE:
                     paused = not paused
                 elif event.key == pygame.K_g:
                     show_gridlines = not show_gridlines
+                    redraw = True
+                elif event.key == pygame.K_i:
+                    show_hud = not show_hud
+                    instruments.counting = show_hud or bool(timings_file)
+                    redraw = True
                 elif event.key == pygame.K_c:
                     clear_board(board)
+                    redraw = True
                 elif event.key == pygame.K_r:
                     fill_board_random(board)
+                    redraw = True
                 elif event.key == pygame.K_s:
                     prompt_text = "enter filename to save (eg. mybug)"
                     save_board()  # Save board to user-specified filename
                 elif event.key == pygame.K_l:
                     prompt_text = "enter filename to load (eg. mybug)"
                     board = load_board()  # Load board to user-specified filename
+                    use_rule_states()
+                    redraw = True
 
             elif paused and event.type == pygame.MOUSEBUTTONDOWN:
                 x, y = pygame.mouse.get_pos()
                 board_x = x // CELL_WIDTH
                 board_y = y // CELL_HEIGHT
                 if 0 <= board_x < dim[0] and 0 <= board_y < dim[1]:
-                    board[board_y, board_x] = 1 - board[board_y, board_x]  # Toggle
+                    board[board_y, board_x] = toggle(board[board_y, board_x])
+                    if changed is None:
+                        changed = np.zeros(board.shape, dtype=bool)
+                    changed[board_y, board_x] = True
 
-        draw_board(screen, board, show_gridlines)
+        instruments.add('events', start)
+
+        # Nothing is drawn while the board sits still.
+        start = time.perf_counter()
+        if redraw:
+            draw_board(screen, board, show_gridlines)
+            redraw = False
+        elif changed is not None:
+            draw_changes(screen, board, changed, show_gridlines)
+        changed = None
+        if show_hud:
+            pygame.display.update(draw_hud(screen, hud_font))
+        instruments.add('draw', start)
 
         if not paused:
-            update_board()
+            start = time.perf_counter()
+            previous = board.copy()
+            if rule is not None:
+                board[:] = step_board(board)
+            else:
+                update_board()
+                instruments.count(previous, board)
+            changed = board != previous
+            instruments.add('update', start)
 
     pygame.quit()
+    finish_instruments(profile)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,151 @@
+import numpy as np
+
+# Bit-packed boards: 64 cells per uint64 word, one row of words per board row.
+# Cell (x, y) lives in bit y % 64 of word y // 64 of row x. Steps use
+# bit-parallel adders, so a whole word of cells is updated with a handful of
+# bitwise operations.
+#
+# Only totalistic Moore-neighborhood rules (the normal 3x3 kernel) work here.
+# Edges behave like engine.step(): counts wrap around and, without wrapping,
+# the one-cell border is cleared.
+#
+# step() works through the board BLOCK rows at a time, each with one row of
+# halo above and below, so the twenty-odd temporary planes of the adders are
+# only block-sized and the peak memory stays close to two boards.
+
+WORD = 64
+ONES = np.uint64(0xFFFFFFFFFFFFFFFF)
+BLOCK = 256  # rows per step() block
+
+
+def _half_add(a, b):
+    return a ^ b, a & b
+
+
+def _full_add(a, b, c):
+    t = a ^ b
+    return t ^ c, (a & b) | (t & c)
+
+
+class PackedBoard:
+    """A two-state board stored as bits."""
+
+    def __init__(self, shape, words=None):
+        self.shape = tuple(shape)
+        self.width = -(-self.shape[1] // WORD)
+        if words is None:
+            words = np.zeros((self.shape[0], self.width), dtype='<u8')
+        self.words = words
+
+    @classmethod
+    def from_array(cls, board):
+        """Pack an ndarray board (anything nonzero counts as alive)."""
+        height, width = board.shape
+        words = -(-width // WORD)
+        bits = np.zeros((height, words * 8), dtype=np.uint8)
+        bits[:, :-(-width // 8)] = np.packbits(board != 0, axis=1, bitorder='little')
+        return cls(board.shape, bits.view('<u8'))
+
+    def to_array(self, dtype=int):
+        """Unpack into the normal ndarray board format."""
+        bits = np.unpackbits(self.words.view(np.uint8), axis=1, count=self.shape[1],
+                             bitorder='little')
+        return bits.astype(dtype, copy=False)
+
+    def copy(self):
+        return PackedBoard(self.shape, self.words.copy())
+
+    def population(self):
+        if hasattr(np, 'bitwise_count'):
+            return int(np.bitwise_count(self.words).sum(dtype=np.int64))
+        # Older NumPy: unpack a row at a time so huge boards don't blow up.
+        return sum(int(np.unpackbits(row.view(np.uint8)).sum()) for row in self.words)
+
+    def __getitem__(self, index):
+        x, y = index
+        return int(self.words[x, y // WORD] >> np.uint64(y % WORD)) & 1
+
+    def __setitem__(self, index, value):
+        x, y = index
+        bit = np.uint64(1) << np.uint64(y % WORD)
+        if value:
+            self.words[x, y // WORD] |= bit
+        else:
+            self.words[x, y // WORD] &= ~bit
+
+    def _edge_mask(self):
+        """Word mask with only the real cells of the last word set."""
+        spare = self.width * WORD - self.shape[1]
+        return ONES >> np.uint64(spare)
+
+    def _west_east(self, words):
+        """Planes holding each cell's left (y - 1) and right (y + 1) neighbor."""
+        one = np.uint64(1)
+        last = np.uint64((self.shape[1] - 1) % WORD)
+        west = words << one
+        west |= np.roll(words, 1, axis=1) >> np.uint64(WORD - 1)
+        east = words >> one
+        east |= np.roll(words, -1, axis=1) << np.uint64(WORD - 1)
+        if self.shape[1] % WORD:
+            # The last word is only partly used, so the wrap-around bits have
+            # to be moved to and from the real last column by hand.
+            west[:, 0] &= ~one
+            west[:, 0] |= (words[:, -1] >> last) & one
+            east[:, -1] &= ~(one << last)
+            east[:, -1] |= (words[:, 0] & one) << last
+        return west, east
+
+    def _window(self, start, stop):
+        """Rows start..stop of the words plus one wrapped halo row on each side."""
+        return self.words.take(range(start - 1, stop + 1), axis=0, mode='wrap')
+
+    def _counts(self, window):
+        """Count planes for the rows of a window between its two halo rows."""
+        west, east = self._west_east(window)
+        s1, c1 = _full_add(west[:-2], window[:-2], east[:-2])
+        s2, c2 = _full_add(west[2:], window[2:], east[2:])
+        s3, c3 = _half_add(west[1:-1], east[1:-1])
+        b0, c4 = _full_add(s1, s2, s3)
+        t, c5 = _full_add(c1, c2, c3)
+        b1, c6 = _half_add(t, c4)
+        b2, b3 = _half_add(c5, c6)
+        return b0, b1, b2, b3
+
+    def counts(self):
+        """Bit planes (1s, 2s, 4s, 8s) of every cell's Moore neighbor count."""
+        return self._counts(self._window(0, self.shape[0]))
+
+    def step(self, S=(2, 3), B=(3,), wrapping=False, block=BLOCK):
+        """Next generation as a new PackedBoard."""
+        new = np.empty_like(self.words)
+        for start in range(0, self.shape[0], block):
+            stop = min(start + block, self.shape[0])
+            window = self._window(start, stop)
+            planes = self._counts(window)
+            alive = window[1:-1]
+            born = np.zeros_like(alive)
+            stay = np.zeros_like(alive)
+            for neighbors in range(9):
+                if neighbors not in S and neighbors not in B:
+                    continue
+                match = ~np.zeros_like(alive)
+                for bit, plane in enumerate(planes):
+                    match &= plane if neighbors >> bit & 1 else ~plane
+                if neighbors in B:
+                    born |= match
+                if neighbors in S:
+                    stay |= match
+            new[start:stop] = (alive & stay) | (~alive & born)
+        new[:, -1] &= self._edge_mask()
+        result = PackedBoard(self.shape, new)
+        if not wrapping:
+            result.clear_border()
+        return result
+
+    def clear_border(self):
+        one = np.uint64(1)
+        self.words[0] = 0
+        self.words[-1] = 0
+        self.words[:, 0] &= ~one
+        self.words[:, -1] &= ~(one << np.uint64((self.shape[1] - 1) % WORD))
+
@@ -0,0 +1,81 @@
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import engine
+from rules import Rule
+
+# Multi-core stepping. The board is split into row bands and each band is
+# stepped by a worker thread. NumPy releases the GIL inside its array loops,
+# so the bands really do run at the same time. Every worker reads its band
+# plus kernel-radius halo rows straight out of the shared current board and
+# writes into its slice of the shared next board, so the halo exchange is just
+# overlapping reads of the same memory. Probability tables are refused, since
+# the workers can't share one random generator and stay reproducible.
+
+
+class ParallelStepper:
+    """Steps board with a pool of worker threads, one row band each."""
+
+    def __init__(self, board, rule, workers=None):
+        if np.issubdtype(np.asarray(rule.table).dtype, np.floating):
+            raise ValueError("ParallelStepper only works with deterministic rules")
+        self.rule = rule
+        self.kernel = rule.kernel
+        self.wrapping = rule.wrapping
+        self.radius = rule.radius
+        self.table = rule.table
+        self.workers = workers or os.cpu_count() or 1
+        self.board = board.astype(np.uint8)
+        self._next = np.empty_like(self.board)
+        edges = np.linspace(0, board.shape[0], self.workers + 1).astype(int)
+        self.bands = [(a, b) for a, b in zip(edges[:-1], edges[1:]) if b > a]
+        self.pool = ThreadPoolExecutor(self.workers)
+
+    def _step_band(self, band):
+        start, stop = band
+        window = engine.band_window(self.board, start, stop, self.radius)
+        r = self.radius
+        counts = engine.window_counts(self.rule.counted(window), self.kernel, r)
+        old = window[r:-r or None, r:-r or None]
+        self._next[start:stop] = engine.lookup(self.table, old, counts)
+
+    def step(self):
+        """Advance one generation; self.board holds the result."""
+        list(self.pool.map(self._step_band, self.bands))
+        if not self.wrapping:
+            engine.clear_border(self._next)
+        self.board, self._next = self._next, self.board
+        return self.board
+
+    def close(self):
+        self.pool.shutdown()
+
+
+def benchmark(size=8192, generations=5, worker_counts=(1, 2, 4, 8)):
+    """Time a random size x size Life board on different worker counts."""
+    board = np.random.default_rng(0).integers(0, 2, (size, size), dtype=np.uint8)
+    results = []
+    for workers in worker_counts:
+        stepper = ParallelStepper(board, Rule.parse('B3/S23'), workers)
+        stepper.step()  # warm up the pool
+        start = time.perf_counter()
+        for _ in range(generations):
+            stepper.step()
+        seconds = (time.perf_counter() - start) / generations
+        stepper.close()
+        results.append((workers, seconds))
+    return results
+
+
+if __name__ == "__main__":
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 8192
+    base = None
+    print(f"{size}x{size} board, {os.cpu_count()} cores available")
+    for workers, seconds in benchmark(size):
+        base = base or seconds
+        print(f"{workers} workers: {seconds * 1000:.1f} ms/gen, "
+              f"{size * size / seconds / 1e6:.0f} M cells/s, speedup {base / seconds:.2f}x")
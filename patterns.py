@@ -0,0 +1,262 @@
+import os
+import re
+
+import numpy as np
+
+# Read and write the standard compact pattern formats: run-length encoded
+# (.rle), Life 1.06 coordinate lists (.lif/.life) and macrocell quadtrees
+# (.mc). Patterns are read as lists of live cells, never as a full dense board,
+# and are written from the bounding box of the live cells only.
+#
+# Cells are (x, y) the same way board[x, y] is indexed: x is the row and y is
+# the column, so a pattern file's text rows are board rows. Read patterns are
+# shifted so their bounding box starts at (0, 0).
+
+RLE_LINE = 70
+
+
+def _normalize(xs, ys):
+    xs = np.asarray(xs, dtype=np.int64)
+    ys = np.asarray(ys, dtype=np.int64)
+    if len(xs):
+        xs = xs - xs.min()
+        ys = ys - ys.min()
+    return xs, ys
+
+
+def _cells(board):
+    xs, ys = np.nonzero(np.asarray(board))
+    return _normalize(xs, ys)
+
+
+# RLE
+
+def read_rle(text):
+    """Parse RLE text into (xs, ys, rule)."""
+    rule = None
+    body = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        if line.startswith('x') and '=' in line and not body:
+            match = re.search(r'rule\s*=\s*([^,\s]+)', line)
+            if match:
+                rule = match.group(1)
+            continue
+        body.append(line)
+    body = ''.join(body)
+    if '!' in body:
+        body = body[:body.index('!')]
+
+    starts, lengths, rows = [], [], []
+    x = y = 0
+    for count, tag in re.findall(r'(\d*)([^\d\s])', body):
+        count = int(count) if count else 1
+        if tag == '$':
+            x += count
+            y = 0
+        elif tag in 'b.':
+            y += count
+        else:
+            # 'o' or a multi-state letter: alive either way here.
+            rows.append(x)
+            starts.append(y)
+            lengths.append(count)
+            y += count
+    lengths = np.array(lengths, dtype=np.int64)
+    xs = np.repeat(np.array(rows, dtype=np.int64), lengths)
+    run_offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    ys = np.repeat(np.array(starts, dtype=np.int64), lengths) + run_offsets
+    return xs, ys, rule
+
+
+def write_rle(board, rule='B3/S23'):
+    """RLE text for the bounding box of board."""
+    xs, ys = _cells(board)
+    height = int(xs.max()) + 1 if len(xs) else 0
+    width = int(ys.max()) + 1 if len(ys) else 0
+    order = np.lexsort((ys, xs))
+    xs, ys = xs[order], ys[order]
+
+    tokens = []
+    row = col = 0
+    i = 0
+    while i < len(xs):
+        if xs[i] > row:
+            tokens.append((int(xs[i] - row), '$'))
+            row, col = int(xs[i]), 0
+        if ys[i] > col:
+            tokens.append((int(ys[i] - col), 'b'))
+        # Length of this run of live cells.
+        j = i
+        while j + 1 < len(xs) and xs[j + 1] == row and ys[j + 1] == ys[j] + 1:
+            j += 1
+        tokens.append((j - i + 1, 'o'))
+        col = int(ys[j]) + 1
+        i = j + 1
+    tokens.append((1, '!'))
+
+    lines = [f"x = {width}, y = {height}" + (f", rule = {rule}" if rule else '')]
+    line = ''
+    for count, tag in tokens:
+        token = (str(count) if count > 1 else '') + tag
+        if len(line) + len(token) > RLE_LINE:
+            lines.append(line)
+            line = ''
+        line += token
+    lines.append(line)
+    return '\n'.join(lines) + '\n'
+
+
+# Life 1.06
+
+def read_life106(text):
+    """Parse Life 1.06 text ('x y' per line, x across) into (xs, ys, None)."""
+    xs, ys = [], []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        across, down = line.split()[:2]
+        xs.append(int(down))
+        ys.append(int(across))
+    xs, ys = _normalize(xs, ys)
+    return xs, ys, None
+
+
+def write_life106(board):
+    xs, ys = _cells(board)
+    lines = ['#Life 1.06']
+    lines.extend(f"{y} {x}" for x, y in zip(xs.tolist(), ys.tolist()))
+    return '\n'.join(lines) + '\n'
+
+
+# Macrocell
+
+def read_macrocell(text):
+    """Parse macrocell text into (xs, ys, rule)."""
+    rule = None
+    nodes = [None]  # node 0 is the empty node
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith('['):
+            continue
+        if line.startswith('#'):
+            if line.startswith('#R'):
+                rule = line[2:].strip()
+            continue
+        if line[0] in '.*$':
+            # An 8x8 leaf: rows end in '$', '.' is dead and '*' is alive.
+            leaf_x, leaf_y = [], []
+            for x, row in enumerate(line.split('$')):
+                for y, cell in enumerate(row):
+                    if cell == '*':
+                        leaf_x.append(x)
+                        leaf_y.append(y)
+            nodes.append((3, np.array(leaf_x, dtype=np.int64), np.array(leaf_y, dtype=np.int64)))
+        else:
+            level, nw, ne, sw, se = (int(v) for v in line.split())
+            nodes.append((level, nw, ne, sw, se))
+
+    expanded = {}
+
+    def expand(index):
+        # Shared nodes are expanded once; their cells are reused with offsets.
+        if index == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        if index in expanded:
+            return expanded[index]
+        node = nodes[index]
+        if len(node) == 3:
+            result = node[1], node[2]
+        else:
+            half = 2 ** (node[0] - 1)
+            parts = [(expand(child), dx, dy) for child, dx, dy in
+                     ((node[1], 0, 0), (node[2], 0, half), (node[3], half, 0), (node[4], half, half))]
+            result = (np.concatenate([xs + dx for (xs, ys), dx, dy in parts]),
+                      np.concatenate([ys + dy for (xs, ys), dx, dy in parts]))
+        expanded[index] = result
+        return result
+
+    xs, ys = expand(len(nodes) - 1) if len(nodes) > 1 else expand(0)
+    xs, ys = _normalize(xs, ys)
+    return xs, ys, rule
+
+
+def write_macrocell(board, rule='B3/S23'):
+    """Macrocell text for the bounding box of board."""
+    xs, ys = _cells(board)
+    size = max(int(xs.max()) + 1 if len(xs) else 1, int(ys.max()) + 1 if len(ys) else 1)
+    level = max(3, int(np.ceil(np.log2(size))))
+    lines = ['[M2] (CS2 patterns.py)']
+    if rule:
+        lines.append(f"#R {rule}")
+    numbers = {}
+
+    def node(xs, ys, level):
+        if len(xs) == 0:
+            return 0
+        if level == 3:
+            leaf = np.zeros((8, 8), dtype=bool)
+            leaf[xs, ys] = True
+            rows = [''.join('*' if cell else '.' for cell in row).rstrip('.') for row in leaf]
+            while rows and not rows[-1]:
+                rows.pop()
+            key = ''.join(row + '$' for row in rows)
+        else:
+            half = 2 ** (level - 1)
+            top, left = xs < half, ys < half
+            children = [node(xs[top & left], ys[top & left], level - 1),
+                        node(xs[top & ~left], ys[top & ~left] - half, level - 1),
+                        node(xs[~top & left] - half, ys[~top & left], level - 1),
+                        node(xs[~top & ~left] - half, ys[~top & ~left] - half, level - 1)]
+            key = f"{level} " + ' '.join(str(child) for child in children)
+        if key not in numbers:
+            lines.append(key)
+            numbers[key] = len(numbers) + 1
+        return numbers[key]
+
+    if node(xs, ys, level) == 0:
+        lines.append(f"{max(level, 4)} 0 0 0 0")
+    return '\n'.join(lines) + '\n'
+
+
+# Files
+
+READERS = {'.rle': read_rle, '.lif': read_life106, '.life': read_life106, '.mc': read_macrocell}
+WRITERS = {'.rle': write_rle, '.lif': write_life106, '.life': write_life106, '.mc': write_macrocell}
+
+
+def read_pattern(filename):
+    """(xs, ys, rule) of the live cells in a pattern file."""
+    extension = os.path.splitext(filename)[1].lower()
+    if extension not in READERS:
+        raise ValueError(f"don't know how to read {extension} patterns")
+    with open(filename) as file:
+        return READERS[extension](file.read())
+
+
+def load_pattern(filename, board, x=0, y=0):
+    """Draw a pattern file into an existing board with its corner at (x, y)."""
+    xs, ys, rule = read_pattern(filename)
+    xs = xs + x
+    ys = ys + y
+    if len(xs) and (xs.min() < 0 or ys.min() < 0 or
+                    xs.max() >= board.shape[0] or ys.max() >= board.shape[1]):
+        raise ValueError(f"{filename} doesn't fit on a {board.shape} board at ({x}, {y})")
+    board[xs, ys] = 1
+    return rule
+
+
+def save_pattern(filename, board, rule='B3/S23'):
+    """Save the live cells of board; the format comes from the extension."""
+    extension = os.path.splitext(filename)[1].lower()
+    if extension not in WRITERS:
+        raise ValueError(f"don't know how to write {extension} patterns")
+    writer = WRITERS[extension]
+    text = writer(board) if writer is write_life106 else writer(board, rule)
+    with open(filename, 'w') as file:
+        file.write(text)
@@ -0,0 +1,83 @@
+import sys
+
+import pygame
+
+from render import BoardRenderer, COLOR_BG, fade_palette
+from trajectory import TrajectoryReader
+
+# Scrub through a recorded trajectory:
+#
+#   python replay.py run.traj
+#
+# Right/Left step one generation, Up/Down ten, Page Up/Page Down a thousand,
+# Home/End jump to the start/end and Space plays or pauses.
+
+WINDOW_WIDTH = 800
+WINDOW_HEIGHT = 800
+fps = 30
+
+STEPS = {
+    pygame.K_RIGHT: 1, pygame.K_LEFT: -1,
+    pygame.K_UP: 10, pygame.K_DOWN: -10,
+    pygame.K_PAGEUP: 1000, pygame.K_PAGEDOWN: -1000,
+}
+
+
+def main(filename):
+    reader = TrajectoryReader(filename)
+    if len(reader) == 0:
+        print(f"{filename} has no generations")
+        return
+    cell_width = max(1, WINDOW_WIDTH // reader.shape[1])
+    cell_height = max(1, WINDOW_HEIGHT // reader.shape[0])
+
+    pygame.init()
+    screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+    clock = pygame.time.Clock()
+    renderer = BoardRenderer(reader.shape, cell_width, cell_height,
+                             fade_palette(reader.states), grid_size=(WINDOW_WIDTH, WINDOW_HEIGHT))
+    show_gridlines = cell_width > 2 and cell_height > 2
+
+    generation = 0
+    shown = None
+    playing = False
+    running = True
+    while running:
+        clock.tick(fps)
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.VIDEOEXPOSE:
+                shown = None
+            elif event.type == pygame.KEYDOWN:
+                if event.key in STEPS:
+                    generation += STEPS[event.key]
+                elif event.key == pygame.K_HOME:
+                    generation = 0
+                elif event.key == pygame.K_END:
+                    generation = len(reader) - 1
+                elif event.key == pygame.K_SPACE:
+                    playing = not playing
+                elif event.key == pygame.K_g:
+                    show_gridlines = not show_gridlines
+                    shown = None
+
+        if playing:
+            generation += 1
+            if generation >= len(reader):
+                playing = False
+        generation = max(0, min(generation, len(reader) - 1))
+
+        if generation != shown:
+            screen.fill(COLOR_BG)
+            renderer.draw(screen, reader.frame(generation), show_gridlines)
+            pygame.display.set_caption(f"Replay {filename}: generation {generation}/{len(reader) - 1}")
+            pygame.display.flip()
+            shown = generation
+
+    reader.close()
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1])
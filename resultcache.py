@@ -0,0 +1,120 @@
+import glob
+import hashlib
+import os
+
+import numpy as np
+
+# On-disk cache of deterministic runs. A run is identified by a hash of the
+# starting board and the compiled rule (Rule.key(): table, kernel and
+# wrapping), and the cache keeps checkpoint boards of that run every
+# interval generations. Asking for generation n resumes from the latest
+# checkpoint at or before n, so a longer run only computes what's new, and
+# runs that share a start and rule share all their checkpoints.
+#
+# Checkpoints are compressed .npz files named <run>-<generation>.npz. Reading
+# one touches its modification time, and when the directory grows past
+# max_bytes the least recently used files are deleted first.
+
+
+class ResultCache:
+    """Cache of checkpoint boards keyed by (starting board, rule, generation)."""
+
+    def __init__(self, directory='.cache/results', max_bytes=1 << 30, interval=1000):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.interval = interval
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, board, rule):
+        """Hex key for runs of rule starting from board."""
+        table = np.asarray(rule.table)
+        if np.issubdtype(table.dtype, np.floating):
+            raise ValueError("only deterministic rules can be cached")
+        cells = np.ascontiguousarray(board, dtype=np.uint8)
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(np.array(cells.shape, dtype=np.int64).tobytes())
+        digest.update(cells.tobytes())
+        digest.update(rule.key())
+        return digest.hexdigest()
+
+    def _path(self, key, generation):
+        return os.path.join(self.directory, f"{key}-{generation}.npz")
+
+    def checkpoints(self, key):
+        """Sorted generations that have a checkpoint for this run."""
+        generations = []
+        for path in glob.glob(os.path.join(self.directory, key + '-*.npz')):
+            name = os.path.basename(path)[len(key) + 1:-len('.npz')]
+            if name.isdigit():
+                generations.append(int(name))
+        return sorted(generations)
+
+    def load(self, key, generation):
+        """Checkpoint board for a generation, or None if it isn't cached."""
+        path = self._path(key, generation)
+        try:
+            with np.load(path) as data:
+                board = data['board']
+        except (OSError, KeyError, ValueError):
+            return None
+        os.utime(path)  # mark as recently used
+        return board
+
+    def save(self, key, generation, board):
+        path = self._path(key, generation)
+        temp = f"{path}.{os.getpid()}.tmp"
+        with open(temp, 'wb') as file:
+            np.savez_compressed(file, board=board)
+        os.replace(temp, path)
+
+    def nearest(self, key, generation):
+        """(g, board) for the latest checkpoint with g <= generation, or (0, None)."""
+        for cached in reversed(self.checkpoints(key)):
+            if cached <= generation:
+                board = self.load(key, cached)
+                if board is not None:
+                    return cached, board
+        return 0, None
+
+    def run(self, board, rule, generations, interval=None):
+        """Board after generations steps of rule, computing only past the nearest checkpoint.
+
+        Returns (board, generation the run resumed from).
+        """
+        interval = interval or self.interval
+        key = self.key(board, rule)
+        start, cached = self.nearest(key, generations)
+        current = board if cached is None else cached.astype(board.dtype, copy=False)
+        for generation in range(start + 1, generations + 1):
+            current = rule.step(current)
+            if generation % interval == 0 or generation == generations:
+                self.save(key, generation, current)
+        self.evict()
+        return current, start
+
+    def size(self):
+        return sum(os.path.getsize(path) for path in glob.glob(os.path.join(self.directory, '*.npz')))
+
+    def evict(self):
+        """Delete least recently used checkpoints until the cache fits in max_bytes."""
+        entries = []
+        for path in glob.glob(os.path.join(self.directory, '*.npz')):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+        return total
+
+    def clear(self):
+        for path in glob.glob(os.path.join(self.directory, '*.npz')):
+            os.remove(path)
@@ -0,0 +1,182 @@
+import re
+
+import numpy as np
+
+import engine
+
+# Rules as objects instead of S/B/kernel module globals. A Rule compiles its
+# survival and birth counts plus the neighborhood into a [cell, neighbors]
+# lookup table once, and every engine uses that table: rule.next_state() for
+# per-cell loops, rule.step() for whole boards, and the other engines (sparse,
+# parallel, chunked, diskboard, batch) take a Rule and look up rule.table with
+# counts of rule.counted(cells). A table of probabilities (Rule.from_table) makes
+# a stochastic rule like the quantum one.
+#
+# Rules can be parsed from the usual strings:
+#   'B3/S23' (or '23/3', the old S/B order)
+#   'R5,C0,M1,S34..58,B34..45,NM' (Larger than Life, as in Golly)
+#   'B2/S/C3' or '/2/3' (Generations: S/B/number of states, as in Golly)
+#
+# Generations rules have more than two states. Cells that fail to survive
+# don't die at once but decay through states 2..C-1, and only state 1 counts
+# as a neighbor. Boards for them are uint8 (see Generations.step()).
+#
+# In Larger-than-Life strings M1 means the cell itself is part of its
+# neighborhood. extras/larger_than_life.py leaves the center out of its Bosco
+# kernel, so the same numbers there match an M0 rule.
+
+
+BRIANS_BRAIN = '/2/3'
+STAR_WARS = '345/2/4'
+
+
+def neighborhood(radius, shape='M', middle=False):
+    """Kernel offsets for a Moore ('M'), von Neumann ('N') or circular ('C') neighborhood."""
+    kernel = []
+    for dx in range(-radius, radius + 1):
+        for dy in range(-radius, radius + 1):
+            if shape == 'N' and abs(dx) + abs(dy) > radius:
+                continue
+            if shape == 'C' and dx * dx + dy * dy > radius * radius:
+                continue
+            if (dx or dy) or middle:
+                kernel.append((dx, dy))
+    return kernel
+
+
+def _counts(text):
+    """'23' -> [2, 3] for single-digit rules."""
+    return [int(c) for c in text]
+
+
+def _ranges(text):
+    """'34..58' -> range(34, 59) as a list; a single number is a one-item list."""
+    if not text:
+        return []
+    low, sep, high = text.partition('..')
+    if not sep:
+        low, sep, high = text.partition('-')
+    return list(range(int(low), int(high) + 1)) if sep else [int(text)]
+
+
+class Rule:
+    """Compiled totalistic rule: survival counts S, birth counts B and a kernel."""
+
+    states = 2
+
+    def __init__(self, S, B, kernel=engine.kernel, wrapping=False, name=None):
+        self.S = tuple(sorted(set(S)))
+        self.B = tuple(sorted(set(B)))
+        self.kernel = [tuple(offset) for offset in kernel]
+        self.wrapping = wrapping
+        self.size = len(self.kernel)
+        self.radius = engine.kernel_radius(self.kernel)
+        self.table = engine.rule_table(self.S, self.B, self.size)
+        self.name = name
+
+    @classmethod
+    def from_table(cls, table, kernel=engine.kernel, wrapping=False, name=None):
+        """Rule with a ready-made [cell, neighbors] table, e.g. probabilities."""
+        rule = cls((), (), kernel, wrapping, name)
+        rule.table = np.asarray(table)
+        rule.S = tuple(int(n) for n in np.nonzero(rule.table[1])[0])
+        rule.B = tuple(int(n) for n in np.nonzero(rule.table[0])[0])
+        return rule
+
+    @classmethod
+    def parse(cls, text, wrapping=False):
+        """Rule from a 'B3/S23', 'R5,C0,M1,S34..58,B34..45,NM' or '/2/3' string."""
+        text = text.strip()
+        if text.upper().startswith('R') and ',' in text:
+            return cls._parse_ltl(text, wrapping)
+        match = re.fullmatch(r'[Bb](\d*)/[Ss](\d*)', text) or re.fullmatch(r'[Ss](\d*)/[Bb](\d*)', text)
+        if match:
+            first, second = match.groups()
+            S, B = (second, first) if text[0] in 'Bb' else (first, second)
+            return cls(_counts(S), _counts(B), engine.kernel, wrapping, text)
+        match = re.fullmatch(r'(\d*)/(\d*)', text)
+        if match:
+            return cls(_counts(match.group(1)), _counts(match.group(2)), engine.kernel, wrapping, text)
+        match = re.fullmatch(r'[Bb](\d*)/[Ss](\d*)/[CcGg](\d+)', text)
+        if match:
+            B, S, states = match.groups()
+            return Generations(_counts(S), _counts(B), int(states), engine.kernel, wrapping, text)
+        match = re.fullmatch(r'(\d*)/(\d*)/(\d+)', text)
+        if match:
+            S, B, states = match.groups()
+            return Generations(_counts(S), _counts(B), int(states), engine.kernel, wrapping, text)
+        raise ValueError(f"can't parse rule {text!r}")
+
+    @classmethod
+    def _parse_ltl(cls, text, wrapping):
+        fields = {}
+        for part in text.upper().split(','):
+            part = part.strip()
+            if not part:
+                continue
+            fields[part[0]] = part[1:]
+        try:
+            radius = int(fields.get('R', 1))
+            states = int(fields.get('C', 0))
+            middle = fields.get('M', '0') == '1'
+            S = _ranges(fields.get('S', ''))
+            B = _ranges(fields.get('B', ''))
+        except ValueError:
+            raise ValueError(f"can't parse rule {text!r}") from None
+        shape = fields.get('N', 'M') or 'M'
+        if shape not in ('M', 'N', 'C'):
+            raise ValueError(f"unknown neighborhood N{shape} in {text!r}")
+        kernel = neighborhood(radius, shape, middle)
+        if states > 2:
+            return Generations(S, B, states, kernel, wrapping, text)
+        return cls(S, B, kernel, wrapping, text)
+
+    def __str__(self):
+        if self.name:
+            return self.name
+        if sorted(self.kernel) == sorted(engine.kernel):
+            return 'B' + ''.join(map(str, self.B)) + '/S' + ''.join(map(str, self.S))
+        return f"Rule(S={list(self.S)}, B={list(self.B)}, {self.size}-cell kernel)"
+
+    def __repr__(self):
+        return f"<Rule {self}>"
+
+    def next_state(self, cell, neighbors):
+        """Scalar lookup for per-cell loops like update_board()."""
+        return self.table.item(int(cell), int(neighbors))
+
+    def counted(self, cells):
+        """The cells as neighbor counts see them (uint8, 1 for alive)."""
+        return cells
+
+    def step(self, board, rng=None):
+        """Next generation of a whole board (rng is needed for probability tables)."""
+        return engine.step_table(board, self.table, self.kernel, self.wrapping, rng)
+
+    def key(self):
+        """Bytes that identify the compiled rule (table, kernel and wrapping)."""
+        kernel = np.array(sorted(self.kernel), dtype=np.int64)
+        return self.table.tobytes() + kernel.tobytes() + bytes([self.wrapping])
+
+
+class Generations(Rule):
+    """Multi-state rule where cells that don't survive decay through states 2..states-1."""
+
+    def __init__(self, S, B, states, kernel=engine.kernel, wrapping=False, name=None):
+        if not 2 <= states <= 256:
+            raise ValueError(f"Generations rules need 2 to 256 states, not {states}")
+        super().__init__(S, B, kernel, wrapping, name)
+        self.states = states
+        self.table = engine.generations_table(self.S, self.B, states, self.size)
+
+    def __str__(self):
+        if self.name:
+            return self.name
+        return super().__str__() + f"/C{self.states}"
+
+    def counted(self, cells):
+        return (cells == 1).view(np.uint8)
+
+    def step(self, board, rng=None):
+        """Next generation as a uint8 state array (one byte per cell)."""
+        return engine.step_states(board, self.table, self.kernel, self.wrapping)
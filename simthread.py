@@ -0,0 +1,123 @@
+import collections
+import threading
+import time
+
+# Run the simulation in a worker thread so its speed no longer depends on the
+# frame rate. The worker steps at its own target rate (or as fast as it can)
+# and publishes each finished generation. The viewer just draws whatever the
+# latest published generation is, so slow frames skip generations instead of
+# slowing the simulation down.
+#
+# Published boards are never written to again: the worker always steps into a
+# fresh board and applies edits (mouse toggles, clears, loads) to its own copy
+# between generations.
+
+
+class Simulation(threading.Thread):
+    """Background stepper.
+
+    step takes a board and returns the next one as a new array (like
+    engine.step), without modifying the board it was given.
+    """
+
+    def __init__(self, board, step, rate=None):
+        super().__init__(daemon=True)
+        self.step = step
+        self.rate = rate  # generations per second, None for unthrottled
+        self._board = board.copy()
+        self._front = self._board.copy()
+        self.generation = 0
+        self._edits = []
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._paused = True
+        self._stopped = False
+        self._times = collections.deque(maxlen=100)
+
+    def latest(self):
+        """(generation, board) of the newest finished generation. Don't modify it."""
+        with self._lock:
+            return self.generation, self._front
+
+    def gens_per_second(self):
+        with self._lock:
+            if len(self._times) < 2 or self._paused:
+                return 0.0
+            span = self._times[-1] - self._times[0]
+            return (len(self._times) - 1) / span if span > 0 else 0.0
+
+    def edit(self, change):
+        """Queue change(board) to run on the worker's board between generations."""
+        with self._lock:
+            self._edits.append(change)
+            self._wake.notify()
+
+    def toggle(self, x, y):
+        def change(board):
+            board[x, y] = 0 if board[x, y] == 1 else 1  # dying states count as dead
+        self.edit(change)
+
+    def replace(self, board):
+        """Swap in a whole new board, e.g. after load_board()."""
+        board = board.copy()
+
+        def change(old):
+            return board
+        self.edit(change)
+
+    @property
+    def paused(self):
+        return self._paused
+
+    def set_paused(self, paused):
+        with self._lock:
+            self._paused = paused
+            self._times.clear()
+            self._wake.notify()
+
+    def stop(self):
+        with self._lock:
+            self._stopped = True
+            self._wake.notify()
+        self.join()
+
+    def _apply_edits(self):
+        # Called with the lock held.
+        if not self._edits:
+            return False
+        board = self._board.copy()
+        for change in self._edits:
+            result = change(board)
+            if result is not None:
+                board = result
+        self._edits.clear()
+        self._board = board
+        self._front = board
+        return True
+
+    def run(self):
+        next_time = time.perf_counter()
+        while True:
+            with self._lock:
+                while not self._stopped and self._paused:
+                    self._apply_edits()
+                    self._wake.wait()
+                    next_time = time.perf_counter()
+                if self._stopped:
+                    return
+                self._apply_edits()
+                board = self._board
+
+            new = self.step(board)
+
+            with self._lock:
+                self._board = new
+                self._front = new
+                self.generation += 1
+                self._times.append(time.perf_counter())
+
+            if self.rate:
+                next_time = max(next_time + 1 / self.rate, time.perf_counter() - 1)
+                delay = next_time - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
@@ -0,0 +1,90 @@
+import numpy as np
+
+import engine
+
+# Stepping that only recomputes tiles near recent activity. A tile can only
+# change next generation if something within kernel reach of it changed this
+# generation, so every other tile is skipped. The board is updated in place and
+# the result is identical to rule.step(). That only holds for deterministic
+# rules, so probability tables are refused.
+
+
+def _dilate(grid, reach):
+    """Grow a tile grid by reach tiles in every direction, wrapping around."""
+    out = grid.copy()
+    for dx in range(-reach[0], reach[0] + 1):
+        for dy in range(-reach[1], reach[1] + 1):
+            if dx or dy:
+                out |= np.roll(grid, (dx, dy), axis=(0, 1))
+    return out
+
+
+class SparseStepper:
+    """Steps board in place, touching only tiles marked as changed."""
+
+    def __init__(self, board, rule, tile=32):
+        if np.issubdtype(np.asarray(rule.table).dtype, np.floating):
+            raise ValueError("SparseStepper only works with deterministic rules")
+        self.board = board
+        self.rule = rule
+        self.kernel = rule.kernel
+        self.wrapping = rule.wrapping
+        self.tile = tile
+        self.radius = rule.radius
+        self.table = rule.table
+        height, width = board.shape
+        self.tiles = (-(-height // tile), -(-width // tile))
+        self.reach = tuple(self._reach(n) for n in board.shape)
+        # Everything counts as changed to begin with, so the first step is a
+        # full one and picks up whatever the board was loaded with.
+        self.changed = np.ones(self.tiles, dtype=bool)
+
+    def _reach(self, n):
+        reach = -(-self.radius // self.tile)
+        if n % self.tile and n % self.tile < self.radius:
+            reach += 1  # the short last tile doesn't cover a full radius
+        return reach
+
+    def mark(self, x, y):
+        """Tell the stepper a cell was edited outside of step()."""
+        self.changed[x // self.tile, y // self.tile] = True
+
+    def mark_all(self):
+        self.changed[:] = True
+
+    def active(self):
+        """Tiles that have to be recomputed on the next step."""
+        return _dilate(self.changed, self.reach)
+
+    def step(self):
+        """Advance the board one generation; returns the number of tiles run."""
+        board = self.board
+        height, width = board.shape
+        tile, radius = self.tile, self.radius
+        tx, ty = np.nonzero(self.active())
+        if len(tx) == 0:
+            return 0
+
+        # Row and column indices of each active tile's window, wrapped around
+        # the board edges. Short edge tiles wrap into the opposite side, which
+        # just recomputes a few cells twice with the same answer.
+        span = np.arange(-radius, tile + radius)
+        rows = (tx[:, None] * tile + span) % height
+        cols = (ty[:, None] * tile + span) % width
+        windows = board[rows[:, :, None], cols[:, None, :]].astype(np.uint8, copy=False)
+        core_rows = rows[:, radius:radius + tile]
+        core_cols = cols[:, radius:radius + tile]
+        old = windows[:, radius:radius + tile, radius:radius + tile]
+
+        counts = engine.window_counts(self.rule.counted(windows), self.kernel, radius)
+        new = engine.lookup(self.table, old, counts)
+        if not self.wrapping:
+            border_rows = (core_rows == 0) | (core_rows == height - 1)
+            border_cols = (core_cols == 0) | (core_cols == width - 1)
+            new[border_rows[:, :, None] | border_cols[:, None, :]] = 0
+
+        changed = (new != old).any(axis=(1, 2))
+        self.changed[:] = False
+        self.changed[tx[changed], ty[changed]] = True
+        board[core_rows[changed][:, :, None], core_cols[changed][:, None, :]] = new[changed]
+        return len(tx)
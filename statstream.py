@@ -0,0 +1,203 @@
+import csv
+
+import numpy as np
+
+# Per-generation statistics as a stream. steps() yields (generation, old,
+# new) for a run while only ever holding two boards, stats() turns each step
+# into a record, and publish() hands every record to any number of
+# subscribers (plain callables: a CSV or Parquet writer, the synth in
+# extras/music.py, a live plot). Long runs can be analysed without keeping
+# any board history around:
+#
+#   publish(stats(steps(board, rule, 100000)), [CsvWriter('stats.csv')])
+#
+# Everything in a record comes from whole-board reductions on the alive and
+# change masks. A cell counts as alive when its state is 1, so dying states
+# of Generations rules count as dead.
+#
+# Block statistics split the board into block x block tiles (the right and
+# bottom edges are dropped if they don't fit). 'entropy' is the Shannon
+# entropy in bits of the tile patterns and 'density' is a histogram of live
+# cells per tile (block * block + 1 bins).
+
+COLUMNS = ['generation', 'population', 'births', 'deaths', 'x0', 'y0', 'x1', 'y1',
+           'entropy', 'density']
+
+
+def bounding_box(alive):
+    """(x0, y0, x1, y1) of the live cells, inclusive, or None for an empty board."""
+    rows = np.flatnonzero(alive.any(axis=1))
+    if len(rows) == 0:
+        return None
+    cols = np.flatnonzero(alive.any(axis=0))
+    return int(rows[0]), int(cols[0]), int(rows[-1]), int(cols[-1])
+
+
+def block_stats(alive, block=2):
+    """(entropy in bits, density histogram) of the block x block tiles of alive."""
+    if not 1 <= block <= 8:
+        raise ValueError("block must be 1 to 8 cells across")
+    height = alive.shape[0] // block
+    width = alive.shape[1] // block
+    codes = np.zeros((height, width), dtype=np.uint16 if block <= 4 else np.uint64)
+    density = np.zeros((height, width), dtype=np.uint16)
+    for bit in range(block * block):
+        dx, dy = divmod(bit, block)
+        cells = alive[dx:height * block:block, dy:width * block:block]
+        codes |= cells.astype(codes.dtype) << bit
+        density += cells
+    histogram = np.bincount(density.ravel(), minlength=block * block + 1)
+    if block * block <= 16:
+        counts = np.bincount(codes.ravel(), minlength=1 << block * block)
+    else:
+        counts = np.unique(codes, return_counts=True)[1]
+    p = counts[counts > 0] / max(codes.size, 1)
+    entropy = float(-(p * np.log2(p)).sum()) + 0.0 if codes.size else 0.0  # + 0.0 turns -0.0 into 0.0
+    return entropy, histogram
+
+
+def generation_stats(generation, old, new, block=2):
+    """Stats record for the step from old to new."""
+    old_alive = np.asarray(old) == 1
+    new_alive = np.asarray(new) == 1
+    entropy, density = block_stats(new_alive, block)
+    return {
+        'generation': generation,
+        'population': int(np.count_nonzero(new_alive)),
+        'births': int(np.count_nonzero(new_alive & ~old_alive)),
+        'deaths': int(np.count_nonzero(old_alive & ~new_alive)),
+        'bbox': bounding_box(new_alive),
+        'entropy': entropy,
+        'density': density,
+    }
+
+
+def steps(board, rule, generations, rng=None, start=0):
+    """Yield (generation, old, new) for each step of a run."""
+    for generation in range(start + 1, generations + 1):
+        new = rule.step(board, rng)
+        yield generation, board, new
+        board = new
+
+
+def trajectory_steps(reader):
+    """Yield (generation, old, new) from a TrajectoryReader recording."""
+    old = reader.frame(0)
+    for generation in range(1, len(reader)):
+        new = reader.frame(generation)
+        yield generation, old, new
+        old = new
+
+
+def stats(steps, block=2):
+    """Yield a stats record for every (generation, old, new) step."""
+    for generation, old, new in steps:
+        yield generation_stats(generation, old, new, block)
+
+
+def publish(records, subscribers):
+    """Send every record to each subscriber, then close() those that have it.
+
+    Returns the last record (or None if there were none).
+    """
+    record = None
+    try:
+        for record in records:
+            for subscriber in subscribers:
+                subscriber(record)
+    finally:
+        for subscriber in subscribers:
+            if hasattr(subscriber, 'close'):
+                subscriber.close()
+    return record
+
+
+def row(record):
+    """Flat CSV row for a record, in COLUMNS order."""
+    bbox = record['bbox'] or ('', '', '', '')
+    return [record['generation'], record['population'], record['births'], record['deaths'],
+            *bbox, f"{record['entropy']:.6f}", ' '.join(map(str, record['density']))]
+
+
+# Subscribers
+
+class CsvWriter:
+    """Writes one row per record; file is a filename or an open text file."""
+
+    def __init__(self, file, header=True):
+        self._owned = isinstance(file, str)
+        self.file = open(file, 'w', newline='') if self._owned else file
+        self.writer = csv.writer(self.file)
+        if header:
+            self.writer.writerow(COLUMNS)
+
+    def __call__(self, record):
+        self.writer.writerow(row(record))
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        if self._owned:
+            self.file.close()
+        else:
+            self.file.flush()
+
+
+class ParquetWriter:
+    """Writes records to a Parquet file in row groups of batch records (needs pyarrow)."""
+
+    def __init__(self, filename, batch=10000):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError("ParquetWriter needs pyarrow (pip install pyarrow)") from None
+        self._pa = pyarrow
+        self._pq = pyarrow.parquet
+        self.filename = filename
+        self.batch = batch
+        self._rows = []
+        self._writer = None
+
+    def __call__(self, record):
+        self._rows.append(record)
+        if len(self._rows) >= self.batch:
+            self._write()
+
+    def _write(self):
+        if not self._rows:
+            return
+        bboxes = [record['bbox'] or (None, None, None, None) for record in self._rows]
+        columns = {name: [record[name] for record in self._rows]
+                   for name in ('generation', 'population', 'births', 'deaths', 'entropy')}
+        for i, name in enumerate(('x0', 'y0', 'x1', 'y1')):
+            columns[name] = [bbox[i] for bbox in bboxes]
+        columns['density'] = [record['density'].tolist() for record in self._rows]
+        table = self._pa.Table.from_pydict(columns)
+        if self._writer is None:
+            self._writer = self._pq.ParquetWriter(self.filename, table.schema)
+        self._writer.write_table(table)
+        self._rows = []
+
+    def close(self):
+        self._write()
+        if self._writer is not None:
+            self._writer.close()
+
+
+class History:
+    """Keeps the scalar columns of every record (not the boards) for plotting."""
+
+    def __init__(self, fields=('population', 'births', 'deaths', 'entropy')):
+        self.fields = fields
+        self.generation = []
+        self.values = {field: [] for field in fields}
+
+    def __call__(self, record):
+        self.generation.append(record['generation'])
+        for field in self.fields:
+            self.values[field].append(record[field])
+
+    def array(self, field):
+        return np.array(self.values[field])
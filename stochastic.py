@@ -0,0 +1,90 @@
+import numpy as np
+
+import batch
+import engine
+from rules import Rule
+
+# Whole-board stochastic stepping for the quantum Game of Life in
+# extras/quantum.py. Instead of quantum_probability() and random.random() per
+# cell, the probabilities live in a [cell, neighbors] array and every
+# generation draws all of its random numbers in one call on a seeded
+# numpy.random.Generator, so runs are reproducible and many realizations can
+# be stepped together as a batch.
+
+
+def normal_pdf(x, mean, sigma):
+    return np.exp(-0.5 * ((x - mean) / sigma) ** 2) / (sigma * np.sqrt(2 * np.pi))
+
+
+def quantum_table(sigma_birth, sigma_survival_2, sigma_survival_3, threshold_birth=3,
+                  threshold_survival_2=2, threshold_survival_3=3):
+    """[cell, neighbors] probability of being alive next generation.
+
+    Same numbers as precompute_probabilities() plus quantum_probability():
+    dead cells are born with the birth probability for any count, live cells
+    only survive on 2 or 3 neighbors, and everything is clipped to [0, 1].
+    """
+    neighbors = np.arange(9)
+    table = np.zeros((2, 9))
+    table[0] = normal_pdf(neighbors, threshold_birth, sigma_birth)
+    table[1, 2] = normal_pdf(2, threshold_survival_2, sigma_survival_2)
+    table[1, 3] = normal_pdf(3, threshold_survival_3, sigma_survival_3)
+    return np.clip(table, 0, 1)
+
+
+def quantum_rule(sigma_birth, sigma_survival_2, sigma_survival_3, wrapping=False):
+    """quantum_table() wrapped up as a Rule for the Moore neighborhood."""
+    table = quantum_table(sigma_birth, sigma_survival_2, sigma_survival_3)
+    name = f"quantum({sigma_birth}, {sigma_survival_2}, {sigma_survival_3})"
+    return Rule.from_table(table, engine.kernel, wrapping, name)
+
+
+def table_from_prob_table(prob_table):
+    """Convert the dict made by precompute_probabilities() into a table."""
+    table = np.zeros((2, 9))
+    for neighbors in range(9):
+        table[0, neighbors] = prob_table.get(neighbors, {}).get('birth', 0)
+    for neighbors, name in ((2, 'survival_2'), (3, 'survival_3')):
+        table[1, neighbors] = prob_table.get(neighbors, {}).get(name, 0)
+    return np.clip(table, 0, 1)
+
+
+def step(board, rule, rng):
+    """One stochastic generation of board, like quantum update_board()."""
+    new, _ = batch.step_batch(board[None], rule, rng)
+    return new[0]
+
+
+def monte_carlo(board, rule, runs, generations, seed=None, chunk=256):
+    """Run many independent realizations of board.
+
+    Realizations are stepped chunk at a time as one (chunk, H, W) stack, each
+    chunk with its own Generator spawned from seed, so the same seed and chunk
+    size always give the same result. Returns per-generation population as a
+    (generations + 1, runs) array and the fraction of runs still alive.
+    """
+    children = np.random.SeedSequence(seed).spawn(-(-runs // chunk))
+    start = np.asarray(board, dtype=np.uint8)
+    population = np.zeros((generations + 1, runs), dtype=np.int64)
+    population[0] = start.sum()
+    for i, child in enumerate(children):
+        rng = np.random.default_rng(child)
+        count = min(chunk, runs - i * chunk)
+        boards = np.repeat(start[None], count, axis=0)
+        for generation in range(1, generations + 1):
+            boards, stats = batch.step_batch(boards, rule, rng)
+            population[generation, i * chunk:i * chunk + count] = stats['population']
+    return {
+        'population': population,
+        'survival': (population > 0).mean(axis=1),
+        'final_mean': population[-1].mean(),
+    }
+
+
+if __name__ == "__main__":
+    import sys
+    board = np.load(sys.argv[1]) if len(sys.argv) > 1 else np.load('bugs/glider.npy')
+    rule = quantum_rule(0.34, 0.34, 0.34)
+    result = monte_carlo(board, rule, runs=1000, generations=100, seed=0)
+    print(f"survival after 100 generations: {result['survival'][-1]:.3f}, "
+          f"mean population {result['final_mean']:.1f}")
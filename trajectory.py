@@ -0,0 +1,184 @@
+import lzma
+import os
+import struct
+import zlib
+
+import numpy as np
+
+# Record every generation of a run into one file. Boards are bit-packed, with
+# one bit plane per bit of the cell state for Generations rules; every
+# keyframe_interval generations a whole board is stored, and in between only
+# the XOR with the previous generation, which is nearly all zeros and
+# compresses down to almost nothing. An index of record offsets at the end of
+# the file lets the reader seek straight to the keyframe before any
+# generation.
+#
+# Layout: header, records, index, footer.
+#   header: MAGIC, compression (1 byte), height, width, keyframe_interval (int64),
+#           states (1 byte; GOLTRAJ1 files have no states byte and two states)
+#   record: kind (b'K' or b'D'), payload length (uint32), compressed payload
+#   index:  one int64 file offset per record
+#   footer: index offset, record count (int64), INDEX_MAGIC
+
+MAGIC = b'GOLTRAJ2'
+OLD_MAGIC = b'GOLTRAJ1'
+INDEX_MAGIC = b'GOLTIDX1'
+HEADER = struct.Struct('<8sBqqqB')
+OLD_HEADER = struct.Struct('<8sBqqq')
+RECORD = struct.Struct('<cI')
+FOOTER = struct.Struct('<qq8s')
+COMPRESSORS = {
+    0: (zlib.compress, zlib.decompress),
+    1: (lzma.compress, lzma.decompress),
+}
+COMPRESSION_IDS = {'zlib': 0, 'lzma': 1}
+
+
+def planes_for(states):
+    """Bit planes needed to store cell states 0..states-1."""
+    return max(1, (states - 1).bit_length())
+
+
+def pack(board, planes=1):
+    if planes == 1:
+        return np.packbits(np.asarray(board) != 0)
+    cells = np.asarray(board, dtype=np.uint8)
+    return np.concatenate([np.packbits(cells >> plane & 1) for plane in range(planes)])
+
+
+def unpack(packed, shape, planes=1):
+    size = shape[0] * shape[1]
+    if planes == 1:
+        return np.unpackbits(packed, count=size).reshape(shape)
+    width = -(-size // 8)
+    cells = np.zeros(size, dtype=np.uint8)
+    for plane in range(planes):
+        cells |= np.unpackbits(packed[plane * width:(plane + 1) * width], count=size) << plane
+    return cells.reshape(shape)
+
+
+class TrajectoryWriter:
+    """Appends generations to a trajectory file."""
+
+    def __init__(self, filename, shape, keyframe_interval=1000, compression='zlib', states=2):
+        self.shape = tuple(shape)
+        self.states = states
+        self.planes = planes_for(states)
+        self.keyframe_interval = keyframe_interval
+        self.compression = COMPRESSION_IDS[compression]
+        self._compress = COMPRESSORS[self.compression][0]
+        self.file = open(filename, 'wb')
+        self.file.write(HEADER.pack(MAGIC, self.compression, self.shape[0], self.shape[1],
+                                    keyframe_interval, states))
+        self.offsets = []
+        self._previous = None
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def append(self, board):
+        """Write the next generation."""
+        if board.shape != self.shape:
+            raise ValueError(f"board shape {board.shape} doesn't match {self.shape}")
+        packed = pack(board, self.planes)
+        if len(self.offsets) % self.keyframe_interval == 0:
+            kind, payload = b'K', packed
+        else:
+            kind, payload = b'D', packed ^ self._previous
+        data = self._compress(payload.tobytes())
+        self.offsets.append(self.file.tell())
+        self.file.write(RECORD.pack(kind, len(data)))
+        self.file.write(data)
+        self._previous = packed
+
+    def close(self):
+        if self.file.closed:
+            return
+        index_offset = self.file.tell()
+        self.file.write(np.array(self.offsets, dtype='<i8').tobytes())
+        self.file.write(FOOTER.pack(index_offset, len(self.offsets), INDEX_MAGIC))
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TrajectoryReader:
+    """Random access to the generations in a trajectory file."""
+
+    def __init__(self, filename):
+        self.file = open(filename, 'rb')
+        magic = self.file.read(len(MAGIC))
+        self.file.seek(0)
+        if magic == MAGIC:
+            *fields, self.states = HEADER.unpack(self.file.read(HEADER.size))
+        elif magic == OLD_MAGIC:
+            fields = OLD_HEADER.unpack(self.file.read(OLD_HEADER.size))
+            self.states = 2
+        else:
+            raise ValueError(f"{filename} is not a trajectory file")
+        magic, compression, height, width, interval = fields
+        self.header_size = self.file.tell()
+        self.planes = planes_for(self.states)
+        self.shape = (height, width)
+        self.keyframe_interval = interval
+        self._decompress = COMPRESSORS[compression][1]
+        self.offsets = self._read_index()
+        self._cached = None  # (generation, packed bits) of the last decoded board
+
+    def _read_index(self):
+        size = self.file.seek(0, os.SEEK_END)
+        if size >= self.header_size + FOOTER.size:
+            self.file.seek(size - FOOTER.size)
+            index_offset, count, magic = FOOTER.unpack(self.file.read(FOOTER.size))
+            if magic == INDEX_MAGIC:
+                self.file.seek(index_offset)
+                return np.frombuffer(self.file.read(8 * count), dtype='<i8')
+        # No index, e.g. the run was killed before close(): scan the records.
+        offsets = []
+        position = self.header_size
+        while position + RECORD.size <= size:
+            self.file.seek(position)
+            kind, length = RECORD.unpack(self.file.read(RECORD.size))
+            if position + RECORD.size + length > size:
+                break
+            offsets.append(position)
+            position += RECORD.size + length
+        return np.array(offsets, dtype='<i8')
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def _record(self, generation):
+        self.file.seek(int(self.offsets[generation]))
+        kind, length = RECORD.unpack(self.file.read(RECORD.size))
+        return kind, np.frombuffer(self._decompress(self.file.read(length)), dtype=np.uint8)
+
+    def frame(self, generation, dtype=int):
+        """The board at generation, as a normal ndarray board."""
+        if not 0 <= generation < len(self):
+            raise IndexError(f"generation {generation} not in 0..{len(self) - 1}")
+        start = generation - generation % self.keyframe_interval
+        if self._cached is not None and start <= self._cached[0] <= generation:
+            # Carry on from the last board decoded, e.g. when scrubbing forwards.
+            current, packed = self._cached
+        else:
+            kind, packed = self._record(start)
+            current = start
+        for g in range(current + 1, generation + 1):
+            kind, payload = self._record(g)
+            packed = payload if kind == b'K' else packed ^ payload
+        self._cached = (generation, packed)
+        return unpack(packed, self.shape, self.planes).astype(dtype, copy=False)
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()